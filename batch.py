@@ -0,0 +1,187 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+
+from cache import ResultCache
+from constants import BATCH_CHUNK_SIZE
+from model import solve_schedule, schedule_cache_key, check_params
+
+
+class BatchResult:
+    """
+    Result of solving one item of the batch.
+    """
+
+    def __init__(self, index, params, schedule=None, error=None, time=0, cacheable=False):
+        """
+        Create a Batch Result.
+        :param index: index of the params in the batch
+        :param params: the Schedule params
+        :param schedule: the best Schedule, None if params are invalid
+        :param error: the error message if params are invalid
+        :param time: seconds spent solving the params
+        :param cacheable: the Schedule can be put to the Result Cache, False if it was found before the deadline
+        """
+        self.index = index
+        self.params = params
+        self.schedule = schedule
+        self.error = error
+        self.time = time
+        self.cacheable = cacheable
+
+    def __str__(self):
+        if self.error is not None:
+            return f"{self.index + 1}.\n{self.params}\n{self.error}"
+        return f"{self.index + 1}.\n{self.params}\n{self.schedule}\n{self.schedule.score}"
+
+    def to_dict(self):
+        """
+        Get the result as a dictionary, which can be written as JSON. Days are written as a string of 1s and 0s.
+        :return:
+        """
+        result = {'index': self.index, 'params': self.params, 'time': self.time}
+        if self.error is not None:
+            result['error'] = self.error
+        else:
+            result.update({
+                'days': ''.join(str(day_type) for day_type in self.schedule.day_types),
+                'penalty': self.schedule.score.penalty,
+                'bonus': self.schedule.score.bonus,
+                'total': self.schedule.score.total,
+            })
+        return result
+
+
+def solve_chunk(chunk, search_params):
+    """
+    Solve the chunk of the batch. Invalid params are returned as errors and don't stop the rest of the chunk.
+    :param chunk: list of (index, params) pairs
+    :param search_params: keyword arguments for 'solve_schedule'
+    :return: list of Batch Results
+    """
+    results = []
+    # 'solve_schedule' caches only the Schedules that can be cached, so the chunk cache tells it to the parent. Equal
+    # params in the chunk are solved once.
+    chunk_cache = ResultCache(max_entries=len(chunk))
+    for index, params in chunk:
+        start = time.perf_counter()
+        try:
+            cached_number = len(chunk_cache.memory)
+            schedule = solve_schedule(params, cache=chunk_cache, **search_params)
+            results.append(BatchResult(index, params, schedule=schedule, time=time.perf_counter() - start,
+                                       cacheable=len(chunk_cache.memory) > cached_number))
+        except AssertionError as e:
+            results.append(BatchResult(index, params, error=str(e), time=time.perf_counter() - start))
+    return results
+
+
+def solve_batch(params_list, workers=None, chunk_size=BATCH_CHUNK_SIZE, ordered=True, max_pending=None,
+                **search_params):
+    """
+    Solve the batch of params on the pool of processes. Params are read lazily, and at most 'max_pending' chunks are
+    submitted to the pool or waiting for the previous chunks at the same time. The Result Cache is used by this process
+    only: cached params are not sent to the pool, and found Schedules are put to the cache when their chunks are
+    completed.
+    :param params_list: iterable of the Schedule params
+    :param workers: number of processes, number of CPUs if None
+    :param chunk_size: number of params sent to a process at once
+    :param ordered: yield results in the input order if True, else in the completion order
+    :param max_pending: max number of chunks submitted to the pool or held until they can be yielded in order, twice
+                        the number of processes if None
+    :param search_params: keyword arguments for 'solve_schedule', including the Result Cache
+    :return: generator of Batch Results
+    """
+    workers = workers or os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * workers
+    cache = search_params.pop('cache', None)
+    # Cache key for each params sent to the pool
+    keys = {}
+
+    def cached_result(index, params):
+        """
+        Get the Batch Result of the cached params, or None if params must be solved.
+        """
+        if cache is None:
+            return None
+        try:
+            check_params(params)
+        except AssertionError:
+            return None
+        key = schedule_cache_key(params, **search_params)
+        schedule = cache.get(key)
+        if schedule is None:
+            keys[index] = key
+            return None
+        return BatchResult(index, params, schedule=schedule)
+
+    def store_results(results):
+        """
+        Put the Schedules of the completed chunk to the cache.
+        """
+        for result in results:
+            key = keys.pop(result.index, None)
+            if key is not None and result.cacheable:
+                cache.put(key, result.schedule)
+        return results
+
+    items = enumerate(params_list)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Chunk index for each submitted future
+        pending = {}
+        # Completed chunks waiting for the previous chunks, used only if results are ordered
+        completed = {}
+        # Cached results of the chunks sent to the pool
+        cached_chunks = {}
+        next_chunk = 0
+        submitted = 0
+        exhausted = False
+
+        while True:
+            while next_chunk in completed:
+                yield from completed.pop(next_chunk)
+                next_chunk += 1
+            if exhausted and not pending:
+                break
+
+            # Keep the pool busy, but don't read the whole input. Results held for the ordered output count as pending,
+            # so a slow chunk doesn't make the completed ones pile up.
+            while not exhausted and len(pending) + len(completed) < max_pending:
+                chunk = list(islice(items, chunk_size))
+                if not chunk:
+                    exhausted = True
+                    break
+                cached = []
+                for index, params in chunk:
+                    result = cached_result(index, params)
+                    if result is not None:
+                        cached.append(result)
+                if cached:
+                    cached_indexes = {result.index for result in cached}
+                    chunk = [item for item in chunk if item[0] not in cached_indexes]
+                if not chunk:
+                    if not ordered:
+                        yield from cached
+                    else:
+                        completed[submitted] = cached
+                    submitted += 1
+                    continue
+                pending[executor.submit(solve_chunk, chunk, search_params)] = submitted
+                cached_chunks[submitted] = cached
+                submitted += 1
+
+            # The input is exhausted, or all read chunks were cached
+            if not pending:
+                continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk_index = pending.pop(future)
+                results = store_results(future.result())
+                cached = cached_chunks.pop(chunk_index)
+                if not ordered:
+                    yield from cached + results
+                    continue
+
+                completed[chunk_index] = sorted(cached + results, key=lambda result: result.index)
@@ -0,0 +1,189 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from constants import SCHEDULE_TEST_PARAMS, BENCHMARK_LONG_HORIZONS, BENCHMARK_BASELINE, BENCHMARK_TIME_TOLERANCE, \
+    BENCHMARK_MIN_TIME_DIFFERENCE, BENCHMARK_SEED
+from model import Schedule, check_params, check_feasibility, create_search, get_schedule_params, select_engine, \
+    ENGINE_CHOICES
+from observers import StatsCollector
+
+
+def benchmark_cases():
+    """
+    Get the benchmark cases: all test params, and each distinct test params with long horizons.
+    :return: list of (case name, params) pairs
+    """
+    cases = [(f'test-{i + 1}', params) for i, params in enumerate(SCHEDULE_TEST_PARAMS)]
+
+    distinct_params = []
+    for params in SCHEDULE_TEST_PARAMS:
+        params = dict(params, num_days=None)
+        if params not in distinct_params:
+            distinct_params.append(params)
+
+    for num_days in BENCHMARK_LONG_HORIZONS:
+        for i, params in enumerate(distinct_params):
+            cases.append((f'long-{num_days}-{i + 1}', dict(params, num_days=num_days)))
+    return cases
+
+
+def run_case(params, engine='tabu', repeat=1):
+    """
+    Run the search for the params.
+    :param params: the Schedule params
+    :param engine: name of the search algorithm
+    :param repeat: number of runs, the fastest one is reported
+    :return: dictionary with the results
+    """
+    result = {'params': params, 'engine': engine}
+    try:
+        check_params(params)
+        check_feasibility(params)
+    except AssertionError as e:
+        result['error'] = str(e)
+        return result
+    if engine == 'auto':
+        engine = result['selected_engine'] = select_engine(params)
+
+    wall_time = None
+    for _ in range(repeat):
+        search = create_search(engine, seed=BENCHMARK_SEED)
+        start = time.perf_counter()
+        best_schedule = search.search(Schedule(get_schedule_params(params)))
+        run_time = time.perf_counter() - start
+        wall_time = run_time if wall_time is None else min(wall_time, run_time)
+
+    # Memory is measured in a separate run, since tracing slows down the search. Random searches use the same seed in
+    # each run, so they find the same Schedule
+    tracemalloc.start()
+    create_search(engine, seed=BENCHMARK_SEED).search(Schedule(get_schedule_params(params)))
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Time to the first Schedule without penalty is measured in a separate run, since observing slows down the search.
+    # Searches that don't report iterations find the Schedule at the end
+    stats = StatsCollector()
+    create_search(engine, observer=stats, seed=BENCHMARK_SEED).search(Schedule(get_schedule_params(params)))
+    time_to_zero_penalty = next((elapsed for elapsed, penalty, _ in stats.best_history if penalty == 0),
+                                wall_time if best_schedule.score.penalty == 0 else None)
+
+    result.update({
+        'wall_time': wall_time,
+        'iterations': search.iterations,
+        'neighbors': search.neighbors,
+        'neighbors_per_second': search.neighbors / wall_time if wall_time > 0 else 0,
+        'peak_memory': peak_memory,
+        'time_to_zero_penalty': time_to_zero_penalty,
+        'penalty': best_schedule.score.penalty,
+        'total': best_schedule.score.total,
+    })
+    return result
+
+
+def run_benchmark(engine='tabu', repeat=1, prefix='', verbose=True):
+    """
+    Run the benchmark cases.
+    :param engine: name of the search algorithm
+    :param repeat: number of runs of each case
+    :param prefix: run only cases with names starting with the prefix
+    :param verbose: print the results
+    :return: dictionary with the results of each case
+    """
+    results = {}
+    for name, params in benchmark_cases():
+        if not name.startswith(prefix):
+            continue
+        results[name] = run_case(params, engine, repeat)
+        if verbose:
+            print(format_result(name, results[name]))
+    return results
+
+
+def format_result(name, result):
+    if 'error' in result:
+        return f"{name}: {result['error']}"
+    time_to_zero_penalty = f"{result['time_to_zero_penalty'] * 1000:.1f} ms" \
+        if result.get('time_to_zero_penalty') is not None else '-'
+    engine = f" ({result['selected_engine']})" if 'selected_engine' in result else ''
+    return f"{name}{engine}: {result['wall_time'] * 1000:.1f} ms, {result['iterations']} iterations, " \
+           f"{result['neighbors_per_second']:.0f} neighbors/s, {result['peak_memory'] / 1024:.0f} KiB, " \
+           f"penalty {result['penalty']}, total {result['total']}, zero penalty after {time_to_zero_penalty}"
+
+
+def find_regressions(results, baseline, time_tolerance=BENCHMARK_TIME_TOLERANCE,
+                     min_time_difference=BENCHMARK_MIN_TIME_DIFFERENCE):
+    """
+    Compare the results with the baseline.
+    :param results: the benchmark results
+    :param baseline: the baseline results
+    :param time_tolerance: allowed relative increase of the wall time
+    :param min_time_difference: wall time increases below this number of seconds are ignored
+    :return: list of regression messages
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or 'error' in result or 'error' in base:
+            continue
+        if base['params'] != result['params'] or base['engine'] != result['engine']:
+            regressions.append(f"{name}: params or engine changed, baseline is not comparable")
+            continue
+
+        # Solution quality
+        if result['penalty'] > base['penalty'] or \
+                (result['penalty'] == base['penalty'] and result['total'] > base['total']):
+            regressions.append(f"{name}: worse schedule, penalty {base['penalty']} -> {result['penalty']}, "
+                               f"total {base['total']} -> {result['total']}")
+
+        # Speed
+        time_difference = result['wall_time'] - base['wall_time']
+        if time_difference > min_time_difference and result['wall_time'] > base['wall_time'] * (1 + time_tolerance):
+            regressions.append(f"{name}: slower, {base['wall_time'] * 1000:.1f} ms -> "
+                               f"{result['wall_time'] * 1000:.1f} ms")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the schedule search.')
+    parser.add_argument('--engine', choices=ENGINE_CHOICES, default='tabu', help='search algorithm')
+    parser.add_argument('--repeat', type=int, default=1, help='number of runs of each case, the fastest is reported')
+    parser.add_argument('--cases', default='',
+                        help="run only cases whose names start with the prefix, e.g. 'test' or 'long-365'; 'test-1' "
+                             "also runs 'test-10' to 'test-19'")
+    parser.add_argument('--baseline', default=BENCHMARK_BASELINE, help='the baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--time-tolerance', type=float, default=BENCHMARK_TIME_TOLERANCE,
+                        help='allowed relative increase of the wall time')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    benchmark_results = run_benchmark(args.engine, args.repeat, args.cases)
+
+    try:
+        with open(args.baseline) as f:
+            baseline_results = json.load(f)
+    except FileNotFoundError:
+        baseline_results = None
+
+    if args.save:
+        # Results of the cases that were not run are kept
+        baseline_results = dict(baseline_results or {}, **benchmark_results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline_results, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+        sys.exit(0)
+
+    if baseline_results is None:
+        print(f'Baseline {args.baseline} not found, run with --save to create it')
+        sys.exit(0)
+
+    found_regressions = find_regressions(benchmark_results, baseline_results, args.time_tolerance)
+    for regression in found_regressions:
+        print(f'REGRESSION {regression}')
+    print(f'{len(found_regressions)} regressions found')
+    sys.exit(1 if found_regressions else 0)
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+from constants import CACHE_MAX_ENTRIES, CACHE_MAX_DISK_SIZE, TRANSPOSITION_TABLE_SIZE
+
+
+def cache_key(params, **search_params):
+    """
+    Get the cache key for the params. Predefined days off are sorted, so the same params always have the same key.
+    :param params: the Schedule params
+    :param search_params: the search settings
+    :return:
+    """
+    return (params['num_days'], params['max_working'], params['min_working'], params['max_off'], params['min_off'],
+            tuple(sorted(params['days_off']))) + tuple(sorted(search_params.items()))
+
+
+class LRUCache:
+    """
+    In-memory cache with the least recently used eviction.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        """
+        Create a new LRU Cache.
+        :param max_entries: max number of entries in the cache
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Get the value from the cache and mark it as the most recently used.
+        :param key: the key
+        :param default: value returned if key is not in the cache
+        :return:
+        """
+        if key not in self._entries:
+            return default
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key, value):
+        """
+        Put the value to the cache. The least recently used entries are removed if the cache is full.
+        :param key: the key
+        :param value: the value
+        :return:
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class TranspositionTable(LRUCache):
+    """
+    Cache of the Schedules seen during the search, keyed by the Schedule fingerprint. Each entry holds the score of
+    the Schedule and the moves to its neighbors. The table can be shared by many searches with the same params.
+    """
+
+    def __init__(self, max_entries=TRANSPOSITION_TABLE_SIZE):
+        """
+        Create a new Transposition Table.
+        :param max_entries: max number of Schedules in the table
+        """
+        super().__init__(max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = super().get(key, default)
+        if entry is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+
+class DiskCache:
+    """
+    On-disk cache, each entry is stored as a pickle file. The least recently used files are removed when the total size
+    of the cache is over the limit.
+    """
+
+    def __init__(self, directory, max_size=CACHE_MAX_DISK_SIZE):
+        """
+        Create a new Disk Cache.
+        :param directory: the cache directory
+        :param max_size: max total size of the cache files in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest() + '.pkl')
+
+    def get(self, key, default=None):
+        """
+        Get the value from the cache.
+        :param key: the key
+        :param default: value returned if key is not in the cache
+        :return:
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        if stored_key != key:
+            return default
+        # Mark the file as recently used
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        """
+        Put the value to the cache, and remove the least recently used files if the cache is too large.
+        :param key: the key
+        :param value: the value
+        :return:
+        """
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used files until the total size is under the limit.
+        :return:
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                os.remove(entry.path)
+
+
+class ResultCache:
+    """
+    Cache of the best Schedules. Schedules are looked up in memory first, then on disk if the directory is set.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, directory=None, max_disk_size=CACHE_MAX_DISK_SIZE):
+        """
+        Create a new Result Cache.
+        :param max_entries: max number of Schedules kept in memory
+        :param directory: the directory of the on-disk cache, disk is not used if None
+        :param max_disk_size: max total size of the on-disk cache in bytes
+        """
+        self.memory = LRUCache(max_entries)
+        self.disk = DiskCache(directory, max_disk_size) if directory is not None else None
+
+    def get(self, key):
+        """
+        Get the Schedule from the cache.
+        :param key: the key
+        :return: copy of the cached Schedule, or None if key is not in the cache
+        """
+        schedule = self.memory.get(key)
+        if schedule is None and self.disk is not None:
+            schedule = self.disk.get(key)
+            if schedule is not None:
+                self.memory.put(key, schedule)
+        return schedule.copy() if schedule is not None else None
+
+    def put(self, key, schedule):
+        """
+        Put the Schedule to the cache.
+        :param key: the key
+        :param schedule: the Schedule
+        :return:
+        """
+        schedule = schedule.copy()
+        self.memory.put(key, schedule)
+        if self.disk is not None:
+            self.disk.put(key, schedule)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
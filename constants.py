@@ -1,9 +1,51 @@
 DEFAULT_DAY_OFF = 4
 
+PARAM_NAMES = ['num_days', 'max_working', 'min_working', 'max_off', 'min_off', 'days_off']
+
 PENALTY_NUM_DAYS_LOWER = 4
 PENALTY_NUM_DAYS_GREATER = 8
 PENALTY_INVALID_CONSECUTIVE_DAYS = 50
 PENALTY_INVALID_DAY_OFF = 40
+
+TABU_LIST_SIZE = 1000
+MAX_ITERATIONS = 5000
+LIMIT_NOT_IMPROVED = 10
+PERIODIC_MAX_WEEKS = 4
+MULTI_START_NUMBER = 8
+ADAPTIVE_TABU_TENURE = 7
+ADAPTIVE_TENURE_INCREASE = 1.2
+ADAPTIVE_TENURE_DECREASE = 0.9
+RESOLVE_WINDOW = 14
+ROLLING_WINDOW = 56
+ROLLING_OVERLAP = 21
+RANDOM_SEARCH_MAX_ITERATIONS = 200000
+RANDOM_SEARCH_LIMIT_NOT_IMPROVED = 5000
+ANNEALING_INITIAL_TEMPERATURE = 50
+ANNEALING_FINAL_TEMPERATURE = 0.5
+LATE_ACCEPTANCE_LENGTH = 100
+SELECTOR_LONG_HORIZON = 365
+
+BATCH_CHUNK_SIZE = 1
+
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+SERVICE_BATCH_SIZE = 8
+SERVICE_BATCH_DELAY = 0.01
+SERVICE_MAX_QUEUED = 1024
+SERVICE_MAX_CONNECTION_REQUESTS = 64
+
+BENCHMARK_LONG_HORIZONS = [365, 730]
+BENCHMARK_BASELINE = 'benchmark_baseline.json'
+BENCHMARK_TIME_TOLERANCE = 0.2
+BENCHMARK_MIN_TIME_DIFFERENCE = 0.005
+BENCHMARK_SEED = 0
+
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_DISK_SIZE = 64 * 1024 * 1024
+TRANSPOSITION_TABLE_SIZE = 4096
+# Max number of masks and feasibility checks kept by the memoized functions of model.py
+MASK_CACHE_SIZE = 256
+FEASIBILITY_CACHE_SIZE = 1024
 SCHEDULE_TEST_PARAMS = [
     # Tymeshift test params
     {'num_days': 28, 'max_working': 5, 'min_working': 2, 'max_off': 3, 'min_off': 1, 'days_off': [5, 6]},
@@ -1,5 +1,10 @@
-from constants import SCHEDULE_TEST_PARAMS
-from model import perform_tabu_search, Schedule
+import argparse
+
+from batch import solve_batch
+from cache import ResultCache, TranspositionTable
+from constants import SCHEDULE_TEST_PARAMS, BATCH_CHUNK_SIZE, MULTI_START_NUMBER, TRANSPOSITION_TABLE_SIZE
+from model import perform_tabu_search, Schedule, ENGINE_CHOICES
+from observers import TraceWriter
 
 
 def test_schedule():
@@ -23,11 +28,54 @@ def test_schedule():
     print(s1 == s2)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Create working schedules for the test params.')
+    parser.add_argument('--batch', action='store_true', help='solve all params on the pool of processes')
+    parser.add_argument('--engine', choices=ENGINE_CHOICES, default='tabu', help='search algorithm')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, number of CPUs by default')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE, help='params sent to a process at once')
+    parser.add_argument('--unordered', action='store_true', help='print results in the completion order')
+    parser.add_argument('--cache-dir', default=None, help='directory of the on-disk cache of the best schedules')
+    parser.add_argument('--starts', type=int, default=MULTI_START_NUMBER,
+                        help='number of initial schedules of the multistart engine')
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='max time of each tabu search in milliseconds, the best schedule found so far is used')
+    parser.add_argument('--trace', default=None, help='write the search trace to the file as JSON lines')
+    parser.add_argument('--transposition-table', type=int, nargs='?', const=TRANSPOSITION_TABLE_SIZE, default=None,
+                        metavar='SIZE', help='share the moves of the seen schedules between the tabu searches, with '
+                                             'at most SIZE schedules; not used with --batch')
+    parser.add_argument('--neighborhood-workers', type=int, default=None,
+                        help='number of processes the days of each tabu search iteration are split between; only '
+                             'for the tabu and periodic engines without --candidates, not used with --batch')
+    parser.add_argument('--candidates', type=int, default=None,
+                        help='number of sequences with violated constraints the tabu search finds moves for in each '
+                             'iteration, all days are checked by default')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the annealing and lahc engines, and of the sampling of the candidate sequences')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    for i, params in enumerate(SCHEDULE_TEST_PARAMS):
-        print(f'{i + 1}.')
-        try:
-            perform_tabu_search(params)
-        except AssertionError as e:
-            print(e)
-        print('-----------------')
+    args = parse_args()
+    cache = ResultCache(directory=args.cache_dir)
+    if args.batch:
+        for result in solve_batch(SCHEDULE_TEST_PARAMS, workers=args.workers, chunk_size=args.chunk_size,
+                                  ordered=not args.unordered, cache=cache, engine=args.engine,
+                                  starts=args.starts, deadline=args.deadline, candidates=args.candidates,
+                                  seed=args.seed):
+            print(result)
+            print('-----------------')
+    else:
+        trace_file = open(args.trace, 'w') if args.trace else None
+        observer = TraceWriter(trace_file) if trace_file else None
+        table = TranspositionTable(args.transposition_table) if args.transposition_table else None
+        for i, params in enumerate(SCHEDULE_TEST_PARAMS):
+            print(f'{i + 1}.')
+            try:
+                perform_tabu_search(params, cache, args.engine, observer, args.starts, args.workers,
+                                    args.deadline, table, args.neighborhood_workers, args.candidates, args.seed)
+            except AssertionError as e:
+                print(e)
+            print('-----------------')
+        if trace_file:
+            trace_file.close()
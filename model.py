@@ -1,9 +1,24 @@
-import copy
+import heapq
+import math
+import multiprocessing
+import random
+import struct
 from abc import abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from operator import and_
+from time import perf_counter, time
 
 from constants import DEFAULT_DAY_OFF, DAY_NAME, PENALTY_NUM_DAYS_GREATER, \
-    PENALTY_NUM_DAYS_LOWER, PENALTY_INVALID_CONSECUTIVE_DAYS, PENALTY_INVALID_DAY_OFF
-from utils import cons_days_number, get_next_available_day, find_best_schedule
+    PENALTY_NUM_DAYS_LOWER, PENALTY_INVALID_CONSECUTIVE_DAYS, PENALTY_INVALID_DAY_OFF, TABU_LIST_SIZE, MAX_ITERATIONS, \
+    LIMIT_NOT_IMPROVED, PERIODIC_MAX_WEEKS, MULTI_START_NUMBER, PARAM_NAMES, ADAPTIVE_TABU_TENURE, \
+    ADAPTIVE_TENURE_INCREASE, ADAPTIVE_TENURE_DECREASE, RESOLVE_WINDOW, ROLLING_WINDOW, ROLLING_OVERLAP, \
+    RANDOM_SEARCH_MAX_ITERATIONS, RANDOM_SEARCH_LIMIT_NOT_IMPROVED, ANNEALING_INITIAL_TEMPERATURE, \
+    ANNEALING_FINAL_TEMPERATURE, LATE_ACCEPTANCE_LENGTH, SELECTOR_LONG_HORIZON, MASK_CACHE_SIZE, FEASIBILITY_CACHE_SIZE
+from cache import cache_key
+from observers import IterationStats
+from utils import find_best_schedule, run_length_encode
 
 
 class DayType:
@@ -47,6 +62,21 @@ class Block:
         return self.working_days == other.working_days and self.days_off == other.days_off
 
 
+class Move:
+    def __init__(self, day_index, day_type, score, fingerprint):
+        """
+        Create a new Move.
+        :param day_index: index of the day that is changed
+        :param day_type: the new type of the day
+        :param score: score of the Schedule after the move
+        :param fingerprint: fingerprint of the Schedule after the move
+        """
+        self.day_index = day_index
+        self.day_type = day_type
+        self.score = score
+        self.fingerprint = fingerprint
+
+
 class Day:
     def __init__(self, day_type, day_index, mutable=True):
         """
@@ -106,6 +136,83 @@ class Day:
         raise TypeError('Cannot change index of the day.')
 
 
+def normalize_days_off(days_off):
+    """
+    Get the predefined days off with Sunday as 7. Sunday can be given as 0 or 7.
+    :param days_off: iterable of predefined days off, from 0 to 7
+    :return: list of days off from 1 to 7
+    """
+    return [day_off % 7 or 7 for day_off in days_off]
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def fixed_days_off_mask(num_days, days_off):
+    """
+    Get the mask of predefined (immutable) days off. The mask is shared by all schedules with the same params.
+    :param num_days: total number of days
+    :param days_off: tuple of predefined days off, from 1 to 7
+    :return: bytes with 1 at the index of each immutable day off
+    """
+    return bytes(1 if i != 0 and (i % 7 + 1) in days_off else 0 for i in range(num_days))
+
+
+@lru_cache(maxsize=MASK_CACHE_SIZE)
+def invalid_day_off_mask(num_days, days_off):
+    """
+    Get the mask of days that are penalized if they are working days.
+    :param num_days: total number of days
+    :param days_off: tuple of predefined days off, from 1 to 7
+    :return: bytes with 1 at the index of each day that should be day off
+    """
+    return bytes(1 if (i % 7 + 1) in days_off else 0 for i in range(num_days))
+
+
+SEARCH_ENGINES = ('tabu', 'dp', 'periodic', 'multistart', 'adaptive', 'annealing', 'lahc')
+# Engines of the command line, 'auto' is chosen by the params, see 'select_engine'
+ENGINE_CHOICES = SEARCH_ENGINES + ('auto',)
+# Searches with random moves, each iteration is a single move so they have their own limits
+RANDOM_SEARCH_ENGINES = ('annealing', 'lahc')
+
+# Translation table used to pack day types into a string of bits
+_BITS_TABLE = bytes.maketrans(b'\x00\x01', b'01')
+_DAY_TYPES_TABLE = bytes.maketrans(b'01', b'\x00\x01')
+# Attributes set by 'Schedule.build_blocks'
+_BLOCKS_ATTRIBUTES = ('blocks', 'run_starts', 'run_ends', 'short_working_blocks')
+
+# Binary format: magic, format version, flags, number of days, max/min working days, max/min days off, predefined days
+# off as bits, penalty, bonus, followed by one bit per day. If the Schedule has its own masks of the days off (see
+# 'Schedule.set_days_off_masks'), the masks of the fixed and of the penalized days off follow, one bit per day each
+SCHEDULE_MAGIC = b'SCHD'
+SCHEDULE_VERSION = 1
+SCHEDULE_HEADER = struct.Struct('<4sBBIHHHHBqq')
+# Flag of the Schedules with their own masks of the days off
+SCHEDULE_CUSTOM_DAYS_OFF = 1
+
+
+def pack_bits(day_bytes):
+    """
+    Pack bytes of 1s and 0s, one per day, into bytes with one bit per day.
+    :param day_bytes: bytes-like object of 1s and 0s
+    :return:
+    """
+    bits = int(bytes(day_bytes[::-1]).translate(_BITS_TABLE), 2) if day_bytes else 0
+    return bits.to_bytes((len(day_bytes) + 7) // 8, 'little')
+
+
+def unpack_bits(data, start, num_days):
+    """
+    Unpack the bits written by 'pack_bits'.
+    :param data: bytes-like object
+    :param start: index of the first byte
+    :param num_days: number of days
+    :return: bytes of 1s and 0s, one per day
+    """
+    if not num_days:
+        return b''
+    bits = int.from_bytes(data[start:start + (num_days + 7) // 8], 'little')
+    return format(bits, f'0{num_days}b').encode()[::-1].translate(_DAY_TYPES_TABLE)
+
+
 class Schedule:
     """
     Schedule class.
@@ -117,43 +224,190 @@ class Schedule:
         :param schedule_params: params list in the following order:
                                 total number of days, max consecutive working days, min consecutive working days,
                                 max consecutive days off, min consecutive days off, predefined days off indices
-        :param days: the schedule (list of 1s and 0s representing working days/days off
+        :param days: the schedule (list of 1s and 0s representing working days/days off, or list of Days)
         """
-        self.num_days, self.max_working, self.min_working, self.max_off, self.min_off, self.days_off = schedule_params
-        self.days = []
-        self.blocks = []
-        self.score = None
+        self.num_days, self.max_working, self.min_working, self.max_off, self.min_off, days_off = schedule_params
+        self.days_off = normalize_days_off(days_off)
+        # Day types are stored as one byte per day, Day objects are created only when requested
+        self.day_types = bytearray()
+        self.fixed_days_off = b''
+        self.invalid_days_off = b''
+        self.custom_days_off = False
         if days:
             assert len(days) == self.num_days, \
                 f"'days' contains {'more' if len(days) > self.num_days else 'less'} days than 'num_days'"
-            self.days = days
+            if isinstance(days[0], Day):
+                self.day_types = bytearray(day.type for day in days)
+                self.set_days_off_masks(bytes(not day.mutable for day in days))
+            else:
+                self.day_types = bytearray(days)
+                self.set_days_off_masks()
         else:
             self.generate_initial_schedule()
-        self.build_blocks()
-        self.evaluate()
+
+    def __getattr__(self, name):
+        # Blocks and score are computed on first access, and cached until a day is changed
+        if name in _BLOCKS_ATTRIBUTES:
+            self.build_blocks()
+        elif name == 'score':
+            self.evaluate()
+        else:
+            raise AttributeError(f"'Schedule' object has no attribute '{name}'")
+        return self.__dict__[name]
 
     def __str__(self):
-        return ", ".join([str(day.type) for day in self.days])
+        return ", ".join([str(day_type) for day_type in self.day_types])
 
     def __eq__(self, other):
-        return self.blocks == other.blocks and self.max_working == other.max_working and \
-               self.min_working == other.min_working and self.max_off == other.max_off and \
-               self.min_off == other.min_off and self.days_off == other.days_off
+        # Own masks of predefined days off are a part of the fingerprint, so equal Schedules have equal hashes
+        return self.fingerprint == other.fingerprint
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        """
+        Make a copy of the Schedule. Only day types are copied, params, masks of predefined days off, blocks and score
+        are shared, since they are never changed in place. The index of sequences is changed in place by
+        'change_day_type_in_place', so it's not shared, and it's built again for the copy on first access. Blocks and
+        score that are not computed yet are computed separately for each copy.
+        :return:
+        """
+        schedule = Schedule.__new__(Schedule)
+        schedule.__dict__.update(self.__dict__)
+        schedule.day_types = bytearray(self.day_types)
+        schedule.__dict__.pop('run_starts', None)
+        schedule.__dict__.pop('run_ends', None)
+        return schedule
+
+    def to_bytes(self):
+        """
+        Get the compact binary representation of the Schedule: the header with params and score, followed by one bit
+        per day. The masks of predefined days off are stored only if they are not created from the params.
+        :return:
+        """
+        days_off = sum(1 << day_off for day_off in set(self.days_off))
+        flags = SCHEDULE_CUSTOM_DAYS_OFF if self.custom_days_off else 0
+        header = SCHEDULE_HEADER.pack(SCHEDULE_MAGIC, SCHEDULE_VERSION, flags, self.num_days, self.max_working,
+                                      self.min_working, self.max_off, self.min_off, days_off, self.score.penalty,
+                                      self.score.bonus)
+        data = header + pack_bits(self.day_types)
+        if self.custom_days_off:
+            data += pack_bits(self.fixed_days_off) + pack_bits(self.invalid_days_off)
+        return data
+
+    @staticmethod
+    def read_header(data, offset=0):
+        """
+        Read the header of the binary Schedule, and the masks of predefined days off if they are stored.
+        :param data: bytes-like object with the binary Schedule
+        :param offset: index of the first byte of the Schedule
+        :return: params list in the order expected by Schedule, the Schedule Score, and the masks of the fixed and of
+                 the penalized days off, None if they are created from the params
+        """
+        magic, version, flags, num_days, max_working, min_working, max_off, min_off, days_off, penalty, bonus = \
+            SCHEDULE_HEADER.unpack_from(data, offset)
+        if magic != SCHEDULE_MAGIC:
+            raise ValueError('Data is not a binary Schedule.')
+        if version != SCHEDULE_VERSION:
+            raise ValueError(f'Binary Schedule version {version} is not supported, expected {SCHEDULE_VERSION}.')
+        days_off = normalize_days_off(day_off for day_off in range(8) if days_off >> day_off & 1)
+        masks = None
+        if flags & SCHEDULE_CUSTOM_DAYS_OFF:
+            start = offset + SCHEDULE_HEADER.size + (num_days + 7) // 8
+            masks = (unpack_bits(data, start, num_days),
+                     unpack_bits(data, start + (num_days + 7) // 8, num_days))
+        return [num_days, max_working, min_working, max_off, min_off, days_off], ScheduleScore(penalty, bonus), masks
+
+    @staticmethod
+    def from_bytes(data, offset=0):
+        """
+        Create the Schedule from the binary representation. The stored score is used, the Schedule is not evaluated.
+        :param data: bytes-like object with the binary Schedule, see 'to_bytes'
+        :param offset: index of the first byte of the Schedule
+        :return:
+        """
+        schedule_params, score, masks = Schedule.read_header(data, offset)
+        num_days = schedule_params[0]
+
+        schedule = Schedule.__new__(Schedule)
+        schedule.num_days, schedule.max_working, schedule.min_working, schedule.max_off, schedule.min_off, \
+            schedule.days_off = schedule_params
+        schedule.day_types = bytearray(unpack_bits(data, offset + SCHEDULE_HEADER.size, num_days))
+        schedule.set_days_off_masks(*(masks or ()))
+        schedule.score = score
+        return schedule
+
+    def set_days_off_masks(self, fixed_days_off=None, invalid_days_off=None):
+        """
+        Set the masks of predefined days off. By default they are created from the params, so they depend only on the
+        day of the week; the Schedule has its own masks if the days off of some dates are changed, see
+        'resolve_schedule'. Own masks are part of 'params_key', so they are stored and compared with the Schedule.
+        :param fixed_days_off: bytes with 1 at the index of each immutable day off, created from the params if None
+        :param invalid_days_off: bytes with 1 at the index of each day that is penalized if it's a working day,
+                                 created from the params if None
+        :return:
+        """
+        default_fixed = fixed_days_off_mask(self.num_days, tuple(self.days_off))
+        default_invalid = invalid_day_off_mask(self.num_days, tuple(self.days_off))
+        self.fixed_days_off = bytes(fixed_days_off) if fixed_days_off is not None else default_fixed
+        self.invalid_days_off = bytes(invalid_days_off) if invalid_days_off is not None else default_invalid
+        self.custom_days_off = self.fixed_days_off != default_fixed or self.invalid_days_off != default_invalid
+
+    @property
+    def days(self):
+        """
+        Get the list of Days. Days are created on demand.
+        :return:
+        """
+        return [Day(day_type, i, not self.fixed_days_off[i]) for i, day_type in enumerate(self.day_types)]
+
+    @property
+    def params_key(self):
+        """
+        Get the tuple of schedule params. Own masks of predefined days off are added if the Schedule has them.
+        :return:
+        """
+        if self.custom_days_off:
+            return self.num_days, self.max_working, self.min_working, self.max_off, self.min_off, \
+                tuple(self.days_off), self.fixed_days_off, self.invalid_days_off
+        return self.num_days, self.max_working, self.min_working, self.max_off, self.min_off, tuple(self.days_off)
+
+    @property
+    def fingerprint(self):
+        """
+        Get the compact, hashable representation of the Schedule. Days are packed into an integer, one bit per day.
+        Two schedules are equal if and only if their fingerprints are equal.
+        :return:
+        """
+        bits = int(self.day_types[::-1].translate(_BITS_TABLE), 2) if self.day_types else 0
+        return self.params_key, bits
 
     def working_days_num(self):
         """
         Calculate the number of working days.
         :return:
         """
-        return sum(day.type for day in self.days)
+        return self.day_types.count(DayType.WORKING_DAY)
 
     def update_schedule(self):
         """
-        Update blocks and score when day is changed.
+        Update blocks and score when day is changed. They are computed again on first access.
         :return:
         """
-        self.build_blocks()
-        self.evaluate()
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Remove cached blocks and score, after day types are changed directly.
+        :return:
+        """
+        for name in _BLOCKS_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+        self.__dict__.pop('score', None)
 
     def change_day_type(self, day_index, new_day_type):
         """
@@ -162,8 +416,59 @@ class Schedule:
         :param new_day_type: the new type
         :return:
         """
-        self.days[day_index].type = new_day_type
-        self.update_schedule()
+        if self.day_types[day_index] == new_day_type:
+            return
+        if self.fixed_days_off[day_index]:
+            raise TypeError('Cannot change type of immutable Day.')
+        score = self.score_after_change(day_index, new_day_type)
+        self.day_types[day_index] = new_day_type
+        self.invalidate()
+        self.score = score
+
+    def change_day_types(self, changes):
+        """
+        Change types of many days at once. Blocks and score are computed again only once, on first access after the
+        changes, and only if a day is changed.
+        :param changes: iterable of (day index, new day type) pairs
+        :return: number of changed days
+        """
+        changes = [(day_index, day_type) for day_index, day_type in changes if self.day_types[day_index] != day_type]
+        if any(self.fixed_days_off[day_index] for day_index, _ in changes):
+            raise TypeError('Cannot change type of immutable Day.')
+        for day_index, day_type in changes:
+            self.day_types[day_index] = day_type
+        if changes:
+            self.invalidate()
+        return len(changes)
+
+    def change_day_type_in_place(self, day_index, new_day_type, score):
+        """
+        Change the type of the day, and update only the index of the sequences next to it, see 'change_bounds'. The
+        index is changed in place, copies of the Schedule have their own index. The number of short working blocks is
+        updated if it's already computed, blocks are built again on first access.
+        :param day_index: index of the day
+        :param new_day_type: the new type
+        :param score: the score after the change, see 'score_delta'
+        :return:
+        """
+        if self.fixed_days_off[day_index]:
+            raise TypeError('Cannot change type of immutable Day.')
+        start, end = self.change_bounds(day_index)
+        short_working_blocks = self.__dict__.get('short_working_blocks')
+        if short_working_blocks is not None:
+            short_working_blocks += self.change_effect(day_index, new_day_type)[2]
+        self.day_types[day_index] = new_day_type
+        run_starts = self.run_starts
+        run_ends = self.run_ends
+        for _, length in run_length_encode(self.day_types, start, end + 1):
+            run_starts[start:start + length] = [start] * length
+            run_ends[start:start + length] = [start + length - 1] * length
+            start += length
+        self.__dict__.pop('blocks', None)
+        self.__dict__.pop('short_working_blocks', None)
+        if short_working_blocks is not None:
+            self.short_working_blocks = short_working_blocks
+        self.score = score
 
     def generate_initial_schedule(self):
         """
@@ -175,39 +480,78 @@ class Schedule:
             self.days_off.append(DEFAULT_DAY_OFF)
 
         # Set predefined days off
-        for i in range(self.num_days):
-            if i != 0 and (i % 7 + 1) in self.days_off:
-                self.days.append(Day(DayType.DAY_OFF, i, False))
-            else:
-                self.days.append(Day(DayType.WORKING_DAY, i))
+        self.set_days_off_masks()
+        self.day_types = bytearray(DayType.DAY_OFF if fixed else DayType.WORKING_DAY for fixed in self.fixed_days_off)
 
     def build_blocks(self):
         """
-        Build blocks for the schedule.
+        Build blocks and the index of consecutive days sequences for the schedule, in a single pass over the days.
         :return:
         """
-        # Reset current blocks
-        self.blocks = []
-        i = 0
-        while i < len(self.days):
-            # Check if first day
-            if i == 0 and self.days[0].is_day_off():
-                n_working = 0
+        blocks = []
+        run_starts = []
+        run_ends = []
+        start = 0
+        for day_type, length in run_length_encode(self.day_types):
+            run_starts.extend([start] * length)
+            run_ends.extend([start + length - 1] * length)
+            start += length
+
+            # Working days start a new block, days off close the current one. If the first day is day off, the first
+            # block has 0 working days
+            if day_type == DayType.WORKING_DAY:
+                blocks.append(Block(length, 0))
+            elif blocks:
+                blocks[-1].days_off = length
             else:
-                # Get number of consecutive working days for a given index
-                n_working = cons_days_number(self.days, i, day_type=DayType.WORKING_DAY)
+                blocks.append(Block(0, length))
 
-            # Check if last working day is actually last in schedule
-            if n_working + i >= len(self.days):
-                n_off = 0
+        self.blocks = blocks
+        self.run_starts = run_starts
+        self.run_ends = run_ends
+        # Number of blocks, except the last one, with violated min_working days constraint
+        self.short_working_blocks = sum(block.working_days < self.min_working for block in blocks[:-1])
 
-            # If day is not last, get number of consecutive days off
-            else:
-                n_off = cons_days_number(self.days, i + n_working, day_type=DayType.DAY_OFF)
+    def apply_move(self, move):
+        """
+        Create a new Schedule by applying the move to the copy of the Schedule.
+        :param move: the move
+        :return:
+        """
+        schedule = self.copy()
+        schedule.day_types[move.day_index] = move.day_type
+        schedule.invalidate()
+        schedule.score = move.score
+        return schedule
+
+    def evaluate_move(self, current_day_off_index, new_day_off_index, fingerprint=None):
+        """
+        Evaluate the move that sets day with 'new_day_off_index' to DAY OFF, without creating a new Schedule.
+        :param current_day_off_index: the index of the current DAY OFF
+        :param new_day_off_index: the index of the day that needs to be changed to DAY OFF
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :return: the move, or None if the move violates the constraints
+        """
+        penalty, bonus, short_blocks, start, runs = self.change_effect(new_day_off_index, DayType.DAY_OFF)
+
+        # Check are conditions violated
+        if start <= current_day_off_index < start + sum(length for _, length in runs):
+            run_end = start
+            for _, nc_off in runs:
+                run_end += nc_off
+                if current_day_off_index < run_end:
+                    break
+        else:
+            nc_off = self.cons_days_number(current_day_off_index)
+
+        # Check the blocks with violated min_working days constraint
+        if nc_off > self.max_off or self.short_working_blocks + short_blocks > 0:
+            return None
 
-            self.blocks.append(Block(n_working, n_off))
-            # Increase the current index
-            i += n_working + n_off
+        params_key, bits = fingerprint or self.fingerprint
+        bits ^= (self.day_types[new_day_off_index] ^ DayType.DAY_OFF) << new_day_off_index
+        return Move(new_day_off_index, DayType.DAY_OFF,
+                    ScheduleScore(self.score.penalty + penalty, self.score.bonus + bonus), (params_key, bits))
 
     def create_schedule_new_day_off(self, current_day_off_index, new_day_off_index):
         """
@@ -216,22 +560,34 @@ class Schedule:
         :param new_day_off_index: the index of the day that needs to be changed to DAY OFF
         :return:
         """
-        # Make a copy of existing Schedule
-        schedule_attempt = copy.deepcopy(self)
-        # Change the day to day off
-        schedule_attempt.change_day_type(new_day_off_index, DayType.DAY_OFF)
+        move = self.evaluate_move(current_day_off_index, new_day_off_index)
+        return self.apply_move(move) if move is not None else None
 
-        # Check are conditions violated
-        nc_off = cons_days_number(schedule_attempt.days, current_day_off_index)
+    def moves_new_days_off(self, current_day_index, fingerprint=None):
+        """
+        Find moves that set first available working days before, and after current day off, to DAY OFF. See
+        'create_schedules_new_days_off'.
+        :param current_day_index: the index of the current day
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :return:
+        """
+        moves = []
 
-        # Get the blocks with violated min_working days constraint
-        invalid_working_days = list(
-            filter(lambda block: block.working_days < self.min_working, schedule_attempt.blocks[:-1]))
+        # Get index of the next available working day
+        next_day_index = self.get_next_available_day(current_day_index, right=True)
+        # Try to change the working day to day off
+        move = self.evaluate_move(current_day_index, next_day_index, fingerprint)
+        if move is not None:
+            moves.append(move)
 
-        if nc_off <= self.max_off and len(invalid_working_days) == 0:
-            return schedule_attempt
+        # Get index of the previous available working day
+        previous_day_index = self.get_next_available_day(current_day_index, right=False)
+        # Try to change the working day to day off
+        move = self.evaluate_move(current_day_index, previous_day_index, fingerprint)
+        if move is not None:
+            moves.append(move)
 
-        return None
+        return moves
 
     def create_schedules_new_days_off(self, current_day_index):
         """
@@ -247,23 +603,51 @@ class Schedule:
         :param current_day_index: the index of the current day
         :return:
         """
-        new_schedules = []
+        return [self.apply_move(move) for move in self.moves_new_days_off(current_day_index)]
 
-        # Get index of the next available working day
-        next_day_index = get_next_available_day(self.days, current_day_index, day_type=DayType.DAY_OFF, right=True)
-        # Try to change the working day to day off
-        s = self.create_schedule_new_day_off(current_day_index, next_day_index)
-        if s is not None:
-            new_schedules.append(s)
+    def moves_new_days_off_wd(self, current_day_index, fingerprint=None):
+        """
+        Find moves that set first and last available working day in the working days sequence current day belongs to,
+        and working days which are min_working days away from the left and right side of sequence, to DAY OFF. See
+        'create_schedules_new_days_off_wd'.
+        :param current_day_index: the index of the current day
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :return:
+        """
+        moves = []
 
-        # Get index of the previous available working day
-        previous_day_index = get_next_available_day(self.days, current_day_index, day_type=DayType.DAY_OFF, right=False)
-        # Try to change the working day to day off
-        s = self.create_schedule_new_day_off(current_day_index, previous_day_index)
-        if s is not None:
-            new_schedules.append(s)
+        # Get the index of first day off on right side
+        next_day_index_right = self.get_next_available_day(current_day_index, right=True)
+        # Index of last working day in the sequence
+        next_day_index_right -= 1
+        move = self.evaluate_move(current_day_index, next_day_index_right, fingerprint)
+        if move is not None:
+            moves.append(move)
+
+        # Get the index of first day off on left side
+        next_day_index_left = self.get_next_available_day(current_day_index, right=False)
+        # Index of first working day in the sequence
+        next_day_index_left += 1
+        move = self.evaluate_move(current_day_index, next_day_index_left, fingerprint)
+        if move is not None:
+            moves.append(move)
+
+        # Because number of cons working days is greater than max, put day in the 'middle'. Helps if from the both side
+        # of working days sequence is max number of days off
+        # min_working days before last working day in the sequence
+        new_index = next_day_index_right - self.min_working
+        if 0 <= new_index < self.num_days:
+            move = self.evaluate_move(current_day_index, new_index, fingerprint)
+            if move is not None:
+                moves.append(move)
+        # min_working days after first working day in the sequence
+        new_index = next_day_index_left + self.min_working
+        if 0 <= new_index < self.num_days:
+            move = self.evaluate_move(current_day_index, new_index, fingerprint)
+            if move is not None:
+                moves.append(move)
 
-        return new_schedules
+        return moves
 
     def create_schedules_new_days_off_wd(self, current_day_index):
         """
@@ -282,44 +666,114 @@ class Schedule:
         :param current_day_index: the index of the current day
         :return:
         """
-        new_schedules = []
+        return [self.apply_move(move) for move in self.moves_new_days_off_wd(current_day_index)]
 
-        # Get the index of first day off on right side
-        next_day_index_right = get_next_available_day(self.days, current_day_index,
-                                                      day_type=DayType.WORKING_DAY,
-                                                      right=True)
-        # Index of last working day in the sequence
-        next_day_index_right -= 1
-        s = self.create_schedule_new_day_off(current_day_index, next_day_index_right)
-        if s is not None:
-            new_schedules.append(s)
+    def find_moves(self, fingerprint=None, start=0, stop=None):
+        """
+        Find all moves to the neighbors of the Schedule. Neighbors are not created, each move holds only the changed
+        day, and the score and fingerprint of the neighbor. If the input params are valid, the min_working and max_off
+        constraints cannot be violated.
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :param start: index of the first day checked for violated constraints
+        :param stop: index after the last day checked, the end of the Schedule if None
+        :return:
+        """
+        fingerprint = fingerprint or self.fingerprint
+        day_types = self.day_types
+        moves = []
+        for i in range(start, len(day_types) if stop is None else stop):
+            day_type = day_types[i]
+            if day_type == DayType.DAY_OFF:
+                nc_off = self.cons_days_number(i)
+                # Check if number of consecutive days off is lower than min
+                if nc_off < self.min_off:
+                    # Find moves that change working days to days off
+                    moves.extend(self.moves_new_days_off(i, fingerprint))
 
-        # Get the index of first day off on left side
-        next_day_index_left = get_next_available_day(self.days, current_day_index,
-                                                     day_type=DayType.WORKING_DAY,
-                                                     right=False)
-        # Index of first working day in the sequence
-        next_day_index_left += 1
-        s = self.create_schedule_new_day_off(current_day_index, next_day_index_left)
-        if s is not None:
-            new_schedules.append(s)
+            if day_type == DayType.WORKING_DAY:
+                nc_working = self.cons_days_number(i)
+                # Check if number of consecutive working days is higher than max
+                if nc_working > self.max_working:
+                    moves.extend(self.moves_new_days_off_wd(i, fingerprint))
 
-        # Because number of cons working days is greater than max, put day in the 'middle'. Helps if from the both side
-        # of working days sequence is max number of days off
-        # min_working days before last working day in the sequence
-        new_index = next_day_index_right - self.min_working
-        if 0 <= new_index < self.num_days:
-            s = self.create_schedule_new_day_off(current_day_index, new_index)
-            if s is not None:
-                new_schedules.append(s)
-        # min_working days after first working day in the sequence
-        new_index = next_day_index_left + self.min_working
-        if 0 <= new_index < self.num_days:
-            s = self.create_schedule_new_day_off(current_day_index, new_index)
-            if s is not None:
-                new_schedules.append(s)
+        return moves
 
-        return new_schedules
+    def run_moves(self, day_index, fingerprint=None):
+        """
+        Find moves for the sequence that starts with the day, if it has less than min_off days off or more than
+        max_working working days. These are the moves 'find_moves' finds for the days of the sequence, but the sequence
+        is checked only once.
+        :param day_index: index of the first day of the sequence
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :return:
+        """
+        nc_days = self.cons_days_number(day_index)
+        if self.day_types[day_index] == DayType.DAY_OFF:
+            return self.moves_new_days_off(day_index, fingerprint) if nc_days < self.min_off else []
+        if nc_days <= self.max_working:
+            return []
+
+        # Moves of working days are checked against the sequence the current day belongs to after the move, so the
+        # moves change only at the changed days. The current day is the first day, each changed day and the day after
+        # it, in the order 'find_moves' checks the days of the sequence
+        run_end = self.run_ends[day_index]
+        left = self.get_next_available_day(day_index, right=False) + 1
+        right = self.get_next_available_day(day_index, right=True) - 1
+        current_days = {day_index}
+        for changed_day in (right, left, right - self.min_working, left + self.min_working):
+            current_days.update(i for i in (changed_day, changed_day + 1) if day_index <= i <= run_end)
+
+        moves = {}
+        for current_day in sorted(current_days):
+            for move in self.moves_new_days_off_wd(current_day, fingerprint):
+                moves.setdefault(move.day_index, move)
+        return list(moves.values())
+
+    def moves_new_working_days(self, fingerprint=None):
+        """
+        Find moves that set the first and the last day of each sequence of days off to WORKING DAY. Predefined days off
+        are not changed, and moves that create blocks with less than min_working days are skipped.
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :return:
+        """
+        params_key, bits = fingerprint or self.fingerprint
+        moves = []
+        start = 0
+        while start < self.num_days:
+            end = self.run_ends[start]
+            if self.day_types[start] == DayType.DAY_OFF:
+                for day_index in {start, end}:
+                    if self.fixed_days_off[day_index]:
+                        continue
+                    penalty, bonus, short_blocks, _, _ = self.change_effect(day_index, DayType.WORKING_DAY)
+                    if self.short_working_blocks + short_blocks > 0:
+                        continue
+                    moves.append(Move(day_index, DayType.WORKING_DAY,
+                                      ScheduleScore(self.score.penalty + penalty, self.score.bonus + bonus),
+                                      (params_key, bits | 1 << day_index)))
+            start = end + 1
+        return moves
+
+    def find_moves_cached(self, transposition_table, find_moves=None):
+        """
+        Find all moves to the neighbors of the Schedule, or get them from the table if the Schedule was already seen.
+        The score of the Schedule is also taken from the table. Moves depend on the function that finds them, so the
+        function is a part of the key, and searches with different neighborhoods can share the table.
+        :param transposition_table: Transposition Table, see 'cache.py'
+        :param find_moves: function called with the Schedule and its fingerprint to find the moves, 'find_moves' if
+                           None
+        :return:
+        """
+        find_moves = find_moves or Schedule.find_moves
+        fingerprint = self.fingerprint
+        key = (find_moves, fingerprint)
+        entry = transposition_table.get(key)
+        if entry is not None:
+            self.score, moves = entry
+            return moves
+        moves = find_moves(self, fingerprint)
+        transposition_table.put(key, (self.score, moves))
+        return moves
 
     def find_neighborhood(self):
         """
@@ -327,22 +781,166 @@ class Schedule:
         cannot be violated.
         :return:
         """
-        neighbors = []
-        for day in self.days:
-            if day.is_day_off():
-                nc_off = cons_days_number(self.days, day.index, day_type=DayType.DAY_OFF)
-                # Check if number of consecutive days off is lower than min
-                if nc_off < self.min_off:
-                    # Create new schedules with changed working days to days off
-                    neighbors.extend(self.create_schedules_new_days_off(day.index))
+        return [self.apply_move(move) for move in self.find_moves()]
 
-            if day.is_working():
-                nc_working = cons_days_number(self.days, day.index, day_type=DayType.WORKING_DAY)
-                # Check if number of consecutive working days is higher than max
-                if nc_working > self.max_working:
-                    neighbors.extend(self.create_schedules_new_days_off_wd(day.index))
+    def run_bounds(self, day_index):
+        """
+        Get the first and the last index of the consecutive days sequence :param day_index belongs to.
+        :param day_index: the index of the day
+        :return:
+        """
+        return self.run_starts[day_index], self.run_ends[day_index]
+
+    def cons_days_number(self, day_index):
+        """
+        Get total number of consecutive days of sequence :param day_index belongs to.
+        :param day_index: the index of the day
+        :return:
+        """
+        return self.run_ends[day_index] - self.run_starts[day_index] + 1
+
+    def get_next_available_day(self, day_index, right=True):
+        """
+        Get the index of the first next day that is not the same type as the current day. If there is no such day, the
+        index of the first/last day is returned.
+        :param day_index: index of the current day
+        :param right: get the next day from the right side if True, else from left side
+        :return:
+        """
+        if right:
+            return min(self.run_ends[day_index] + 1, len(self.day_types) - 1)
+        return max(self.run_starts[day_index] - 1, 0)
+
+    def run_penalty(self, day_type, length, last_block=False):
+        """
+        Get the number of days a sequence of consecutive days is over/under the limits. Sequences in the last block
+        are checked only for max constraints.
+        :param day_type: type of the days in the sequence
+        :param length: number of consecutive days
+        :param last_block: is the sequence in the last block
+        :return:
+        """
+        if day_type == DayType.WORKING_DAY:
+            max_days, min_days = self.max_working, self.min_working
+        else:
+            max_days, min_days = self.max_off, self.min_off
+
+        if max_days < length:
+            return length - max_days
+        if not last_block and length < min_days:
+            return min_days - length
+        return 0
+
+    @staticmethod
+    def last_block_start(runs, last_runs):
+        """
+        Get the index of the first sequence in the last block.
+        :param runs: list of (day type, number of consecutive days) pairs
+        :param last_runs: are the runs the last runs of the schedule
+        :return:
+        """
+        # The last block is the last sequence, together with the working days before it if it's sequence of days off
+        last_block_start = len(runs)
+        if last_runs and runs:
+            last_block_start -= 1
+            if runs[-1][0] == DayType.DAY_OFF and len(runs) > 1:
+                last_block_start -= 1
+        return last_block_start
+
+    def runs_penalty(self, runs, last_runs):
+        """
+        Get the number of days the sequences are over/under the limits.
+        :param runs: list of (day type, number of consecutive days) pairs
+        :param last_runs: are the runs the last runs of the schedule
+        :return:
+        """
+        last_block_start = self.last_block_start(runs, last_runs)
+        return sum(self.run_penalty(day_type, length, i >= last_block_start)
+                   for i, (day_type, length) in enumerate(runs))
+
+    def runs_short_working_blocks(self, runs, last_runs):
+        """
+        Get the number of blocks, except the last one, with less than min_working consecutive working days.
+        :param runs: list of (day type, number of consecutive days) pairs
+        :param last_runs: are the runs the last runs of the schedule
+        :return:
+        """
+        last_block_start = self.last_block_start(runs, last_runs)
+        return sum(day_type == DayType.WORKING_DAY and length < self.min_working
+                   for day_type, length in runs[:last_block_start])
+
+    def change_bounds(self, day_index):
+        """
+        Get the first and the last index of the days whose sequences can be changed if the type of the day is changed.
+        The bounds are the same before and after the change.
+        :param day_index: index of the day
+        :return:
+        """
+        last_index = len(self.day_types) - 1
+        # Sequences that can be merged or split by the change
+        start = self.run_bounds(max(day_index - 1, 0))[0]
+        end = self.run_bounds(min(day_index + 1, last_index))[1]
+        # The last block depends on the last two sequences, so include them if the change is close to the end
+        if end < last_index and self.run_bounds(end + 1)[1] == last_index:
+            end = last_index
+        if end == last_index and start > 0:
+            start = self.run_bounds(start - 1)[0]
+        return start, end
+
+    def change_effect(self, day_index, new_day_type):
+        """
+        Calculate how the Schedule would change if the type of the day is changed. Only the sequences next to the day
+        are checked, the rest of the schedule is not evaluated.
+        :param day_index: index of the day
+        :param new_day_type: the new type
+        :return: penalty difference, bonus difference, difference in number of blocks with less than min_working days,
+                 index of the first checked day and the checked sequences after the change
+        """
+        old_day_type = self.day_types[day_index]
+        last_index = len(self.day_types) - 1
+        start, end = self.change_bounds(day_index)
+
+        runs_before = run_length_encode(self.day_types, start, end + 1)
+        changed_days = self.day_types[start:end + 1]
+        changed_days[day_index - start] = new_day_type
+        runs_after = run_length_encode(changed_days)
+
+        consecutive_days = self.runs_penalty(runs_after, end == last_index) - \
+            self.runs_penalty(runs_before, end == last_index)
+        short_blocks = self.runs_short_working_blocks(runs_after, end == last_index) - \
+            self.runs_short_working_blocks(runs_before, end == last_index)
+
+        # If the first day is day off, the first block has 0 working days
+        working_days = self.score.bonus + new_day_type - old_day_type
+        first_day_type = new_day_type if day_index == 0 else self.day_types[0]
+        first_block_before = self.day_types[0] == DayType.DAY_OFF and self.score.bonus > 0
+        first_block_after = first_day_type == DayType.DAY_OFF and working_days > 0
+        consecutive_days += (first_block_after - first_block_before) * self.run_penalty(DayType.WORKING_DAY, 0)
+        short_blocks += (first_block_after - first_block_before) * (0 < self.min_working)
+
+        penalty = PENALTY_INVALID_CONSECUTIVE_DAYS * consecutive_days + \
+            PENALTY_INVALID_DAY_OFF * self.invalid_days_off[day_index] * (new_day_type - old_day_type)
+
+        return penalty, new_day_type - old_day_type, short_blocks, start, runs_after
+
+    def score_delta(self, day_index, new_day_type):
+        """
+        Calculate how penalty and bonus would change if the type of the day is changed.
+        :param day_index: index of the day
+        :param new_day_type: the new type
+        :return: penalty and bonus differences
+        """
+        return self.change_effect(day_index, new_day_type)[:2]
 
-        return neighbors
+    def score_after_change(self, day_index, new_day_type):
+        """
+        Get the score the Schedule would have if the type of the day is changed.
+        :param day_index: index of the day
+        :param new_day_type: the new type
+        :return:
+        """
+        penalty, bonus = self.score_delta(day_index, new_day_type)
+        return ScheduleScore(self.score.penalty + penalty, self.score.bonus + bonus)
 
     def evaluate(self):
         """
@@ -360,8 +958,8 @@ class Schedule:
         Penalize schedule if number of days is over/under the limit.
         :return: number of days over/under the limit times 8/4
         """
-        days_difference = abs(len(self.days) - self.num_days)
-        return days_difference * PENALTY_NUM_DAYS_GREATER if len(self.days) > self.num_days else \
+        days_difference = abs(len(self.day_types) - self.num_days)
+        return days_difference * PENALTY_NUM_DAYS_GREATER if len(self.day_types) > self.num_days else \
             days_difference * PENALTY_NUM_DAYS_LOWER
 
     def eval_consecutive_days(self):
@@ -411,41 +1009,197 @@ class Schedule:
         Penalize schedule if predefined days off are invalid.
         :return:
         """
-        penalty = 0
-        for day in self.days:
-            if (day.index + 1) % 7 in self.days_off and day.is_working():
-                penalty += PENALTY_INVALID_DAY_OFF
+        return PENALTY_INVALID_DAY_OFF * sum(map(and_, self.day_types, self.invalid_days_off))
+
+
+class CandidateList:
+    """
+    Candidate list of the sequences with violated constraints, ranked by their penalty. Moves are found only for the
+    sequences at the top of the list, so the neighborhood depends on the number of violations, not on the number of
+    days. After a move, only the sequences next to the changed day are ranked again.
+    """
+
+    def __init__(self, schedule, size, seed=None):
+        """
+        Create a new Candidate List.
+        :param schedule: the initial schedule
+        :param size: number of sequences moves are found for in each iteration
+        :param seed: seed of the random sampling of sequences; sequences with higher penalty are more likely to be
+                     chosen. The top sequences are chosen if None
+        """
+        self.size = size
+        self.random = random.Random(seed) if seed is not None else None
+        # Penalty of each sequence with violated constraints, by the index of its first day
+        self.runs = {}
+        self.rank_runs(schedule, 0, schedule.num_days - 1)
 
+    def __len__(self):
+        return len(self.runs)
+
+    @staticmethod
+    def run_priority(schedule, start, end):
+        """
+        Get the penalty of the sequence of consecutive days and of its invalid days off.
+        :param schedule: the schedule
+        :param start: index of the first day of the sequence
+        :param end: index of the last day of the sequence
+        :return: the penalty, or None if moves are not found for the sequence
+        """
+        day_type = schedule.day_types[start]
+        length = end - start + 1
+        if day_type == DayType.DAY_OFF and length >= schedule.min_off or \
+                day_type == DayType.WORKING_DAY and length <= schedule.max_working:
+            return None
+
+        # The last block is the last sequence, together with the working days before it if it's sequence of days off
+        last_index = schedule.num_days - 1
+        last_block = end == last_index or day_type == DayType.WORKING_DAY and schedule.run_ends[end + 1] == last_index
+        penalty = PENALTY_INVALID_CONSECUTIVE_DAYS * schedule.run_penalty(day_type, length, last_block)
+        if day_type == DayType.WORKING_DAY:
+            penalty += PENALTY_INVALID_DAY_OFF * sum(schedule.invalid_days_off[start:end + 1])
         return penalty
 
+    def rank_runs(self, schedule, start, end):
+        """
+        Rank the sequences between the days.
+        :param schedule: the schedule
+        :param start: index of the first day of the first sequence
+        :param end: index of the last day of the last sequence
+        :return:
+        """
+        day_index = start
+        while day_index <= end:
+            run_end = schedule.run_ends[day_index]
+            priority = self.run_priority(schedule, day_index, run_end)
+            if priority is not None:
+                self.runs[day_index] = priority
+            day_index = run_end + 1
+
+    def update(self, schedule, day_index):
+        """
+        Rank again the sequences changed by the move.
+        :param schedule: the schedule after the move
+        :param day_index: index of the changed day
+        :return:
+        """
+        start, end = schedule.change_bounds(day_index)
+        for run_start in range(start, end + 1):
+            self.runs.pop(run_start, None)
+        self.rank_runs(schedule, start, end)
+
+    def top_runs(self):
+        """
+        Get the first days of the sequences moves are found for, in the order of days.
+        :return:
+        """
+        if self.random is None:
+            runs = heapq.nsmallest(self.size, self.runs.items(), key=lambda run: (-run[1], run[0]))
+        else:
+            # Weighted sampling without replacement, the sequences with the largest random keys are chosen
+            runs = heapq.nlargest(self.size, sorted(self.runs.items()),
+                                  key=lambda run: self.random.random() ** (1 / (run[1] + 1)))
+        return sorted(run_start for run_start, _ in runs)
+
+    def find_moves(self, schedule, fingerprint=None, all_runs=False):
+        """
+        Find moves for the top sequences, see 'Schedule.run_moves'.
+        :param schedule: the schedule
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :param all_runs: find moves for all ranked sequences, they are the moves of 'Schedule.find_moves'
+        :return:
+        """
+        fingerprint = fingerprint or schedule.fingerprint
+        moves = []
+        for run_start in sorted(self.runs) if all_runs else self.top_runs():
+            moves.extend(schedule.run_moves(run_start, fingerprint))
+        return moves
+
 
 class Search:
     """
     Search class.
     """
 
-    def __init__(self, max_iterations, limit_not_improved):
+    def __init__(self, max_iterations, limit_not_improved, verbose=True, observer=None, should_stop=None,
+                 deadline=None):
         """
         Init method.
         :param max_iterations: max number of iterations to perform search
         :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+        :param verbose: print search info
+        :param observer: Search Observer notified about the search progress, see 'observers.py'
+        :param should_stop: function checked before each iteration, the search is cancelled when it returns True
+        :param deadline: max search time in milliseconds, the best Schedule found so far is returned when it's reached
         """
         self.max_iterations = max_iterations
         self.limit_not_improved = limit_not_improved
+        self.verbose = verbose
+        self.observer = observer
+        self.should_stop = should_stop
+        self.deadline = deadline
+        # Number of iterations performed, and neighbors generated by the last search
+        self.iterations = 0
+        self.neighbors = 0
+        # Whether the last search was cancelled by 'should_stop', or stopped by the deadline
+        self.cancelled = False
+        self.timed_out = False
 
     @abstractmethod
     def search(self, initial_schedule):
         raise NotImplemented('Method not implemented.')
 
 
+def _neighborhood_worker(connection, schedule, start, stop, tabu_list_size):
+    """
+    Find the best moves of the range of days, in the worker process of the Tabu search. The worker keeps its own copy
+    of the current schedule and of the tabu memory, so it gets only the applied moves. After each move, it sends the
+    best allowed move or None, number of moves, and number of tabu moves.
+    :param connection: connection to the search process, None is received when the search ends
+    :param schedule: the initial schedule
+    :param start: index of the first day of the range
+    :param stop: index after the last day of the range
+    :param tabu_list_size: size of the tabu list
+    :return:
+    """
+    memory = TabuSearch(tabu_list_size, 0, 0, verbose=False)
+    memory.start_memory(schedule)
+    while True:
+        moves = schedule.find_moves(None, start, stop)
+        allowed = memory.allowed_moves(moves, schedule, 0)
+        connection.send((find_best_schedule(allowed) if allowed else None, len(moves), len(moves) - len(allowed)))
+        move = connection.recv()
+        if move is None:
+            break
+        schedule = schedule.apply_move(move)
+        memory.update_memory(move, 0)
+    connection.close()
+
+
 class TabuSearch(Search):
     """
-    Tabu Search algorithm.
+    Tabu Search algorithm. Subclasses change the neighborhood and the tabu memory by overriding 'start_memory',
+    'find_neighborhood', 'allowed_moves' and 'update_memory'.
     """
 
-    def __init__(self, tabu_list_size, max_iterations, limit_not_improved):
-        super().__init__(max_iterations, limit_not_improved)
+    def __init__(self, tabu_list_size, max_iterations, limit_not_improved, verbose=True, observer=None,
+                 should_stop=None, deadline=None, transposition_table=None, neighborhood_workers=None,
+                 candidates=None, seed=None):
+        super().__init__(max_iterations, limit_not_improved, verbose, observer, should_stop, deadline)
+        if neighborhood_workers is not None and candidates is not None:
+            raise ValueError("'neighborhood_workers' cannot be used with 'candidates'")
         self.tabu_size = tabu_list_size
+        # Moves of the already seen Schedules, see 'cache.TranspositionTable'
+        self.transposition_table = transposition_table
+        # Number of processes the days are split between to find the neighbors, the neighbors are found in the search
+        # process if None
+        self.neighborhood_workers = neighborhood_workers
+        # Number of sequences with violated constraints moves are found for, and the seed of their random sampling, see
+        # 'CandidateList'. All days are checked if None
+        self.candidates = candidates
+        self.seed = seed
+        # Tabu memory of the last search, see 'start_memory'
+        self.tabu_set = set()
+        self.tabu_queue = deque()
 
     def search(self, initial_schedule: Schedule):
         """
@@ -453,40 +1207,939 @@ class TabuSearch(Search):
         :param initial_schedule: the initial schedule
         :return:
         """
+        best_schedule = initial_schedule
+        for best_schedule, _ in self.improvements(initial_schedule):
+            pass
+        return best_schedule
+
+    def improvements(self, initial_schedule: Schedule):
+        """
+        The Tabu search algorithm, which yields the initial schedule and each new best schedule as soon as it's found.
+        The last yielded schedule is the best one.
+        :param initial_schedule: the initial schedule
+        :return: generator of (best Schedule, Schedule Score) pairs
+        """
+        if self.neighborhood_workers is None:
+            yield from self._improvements(initial_schedule, None)
+            return
+
+        workers = self.start_workers(initial_schedule)
+        try:
+            yield from self._improvements(initial_schedule, workers)
+        finally:
+            for process, connection in workers:
+                connection.send(None)
+                process.join()
+                connection.close()
+
+    def start_workers(self, initial_schedule):
+        """
+        Start the processes the days are split between to find the neighbors, see '_neighborhood_worker'. The initial
+        schedule is sent to them once, then only the applied moves are sent.
+        :param initial_schedule: the initial schedule
+        :return: list of (process, connection) pairs, in the order of days
+        """
+        workers = []
+        parts = self.neighborhood_workers
+        for k in range(parts):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_neighborhood_worker, daemon=True, args=(
+                worker_connection, initial_schedule, initial_schedule.num_days * k // parts,
+                initial_schedule.num_days * (k + 1) // parts, self.tabu_size))
+            process.start()
+            worker_connection.close()
+            workers.append((process, connection))
+        return workers
+
+    @staticmethod
+    def find_best_moves(workers):
+        """
+        Get the best move of each range of days from the worker processes. Ranges are in the order of days, so the
+        first best of the returned moves is the move chosen by the serial search.
+        :param workers: list of (process, connection) pairs
+        :return: the best moves, number of moves, and number of tabu moves
+        """
+        moves = []
+        neighbors_number = 0
+        rejected = 0
+        for _, connection in workers:
+            move, number, tabu_number = connection.recv()
+            if move is not None:
+                moves.append(move)
+            neighbors_number += number
+            rejected += tabu_number
+        return moves, neighbors_number, rejected
+
+    def start_memory(self, initial_schedule):
+        """
+        Reset the tabu memory before the search. The memory holds only fingerprints; the set is used for lookups, the
+        queue keeps the insertion order.
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+        self.tabu_set = set()
+        self.tabu_queue = deque()
+
+    def find_neighborhood(self, schedule, candidate_list):
+        """
+        Get moves to all of the neighbors of the Schedule, or only to the neighbors of the top candidates.
+        :param schedule: the current schedule
+        :param candidate_list: the Candidate List, None if all days are checked
+        :return: list of moves
+        """
+        if candidate_list is not None:
+            return candidate_list.find_moves(schedule)
+        if self.transposition_table is None:
+            return schedule.find_moves()
+        return schedule.find_moves_cached(self.transposition_table)
+
+    def allowed_moves(self, moves, best_schedule, iteration):
+        """
+        Filter the moves to already checked schedules.
+        :param moves: moves to the neighbors
+        :param best_schedule: the best schedule found so far
+        :param iteration: index of the iteration
+        :return: list of the moves that are not tabu
+        """
+        tabu_set = self.tabu_set
+        return [move for move in moves if move.fingerprint not in tabu_set]
+
+    def update_memory(self, move, iteration):
+        """
+        Make the Schedule of the applied move tabu.
+        :param move: the applied move
+        :param iteration: index of the iteration
+        :return:
+        """
+        fingerprint = move.fingerprint
+        self.tabu_set.add(fingerprint)
+        self.tabu_queue.append(fingerprint)
+        if len(self.tabu_queue) > self.tabu_size:
+            self.tabu_set.discard(self.tabu_queue.popleft())
+
+    def _improvements(self, initial_schedule, workers):
         count = 0
-        initial_schedule.evaluate()
+        self.neighbors = 0
+        self.cancelled = False
+        self.timed_out = False
         best_schedule = initial_schedule
         current_schedule = initial_schedule
-        tabu_list = []
-
+        yield best_schedule, best_schedule.score
+        self.start_memory(initial_schedule)
+        candidate_list = None
+        if self.candidates is not None:
+            candidate_list = CandidateList(initial_schedule, self.candidates, self.seed)
+            # The current Schedule and its index of sequences are changed in place, so the cost of an iteration doesn't
+            # depend on the number of days
+            current_schedule = initial_schedule.copy()
+
+        # Timings are measured only if there is an observer
+        observer = self.observer
+        if observer is not None:
+            observer.on_start(self, initial_schedule)
+            search_start = perf_counter()
+
+        should_stop = self.should_stop
+        deadline_time = perf_counter() + self.deadline / 1000 if self.deadline is not None else None
         not_improved_counter = 0
+        finished = False
         while count <= self.max_iterations:
-            # Get all of the neighbors
-            neighbors = current_schedule.find_neighborhood()
-            # Filter already checked schedules
-            neighbors = list(filter(lambda neighbor: neighbor not in tabu_list, neighbors))
+            if should_stop is not None and should_stop():
+                self.cancelled = True
+                break
+            if deadline_time is not None and perf_counter() >= deadline_time:
+                self.timed_out = True
+                break
+
+            if observer is not None:
+                iteration_start = perf_counter()
+
+            if workers is None:
+                moves = self.find_neighborhood(current_schedule, candidate_list)
+                neighbors_number = len(moves)
+
+                if observer is not None:
+                    find_neighborhood_end = perf_counter()
 
-            if len(neighbors) > 0:
-                current_schedule = find_best_schedule(neighbors)
+                moves = self.allowed_moves(moves, best_schedule, count)
+                if not moves and candidate_list is not None and len(candidate_list) > candidate_list.size:
+                    # The top sequences have no allowed move, so moves of all sequences are checked before the search
+                    # stops
+                    moves = candidate_list.find_moves(current_schedule, all_runs=True)
+                    neighbors_number += len(moves)
+                    moves = self.allowed_moves(moves, best_schedule, count)
+                rejected = neighbors_number - len(moves)
+            else:
+                # Workers return only the best move of each range of days, tabu moves are already filtered
+                moves, neighbors_number, rejected = self.find_best_moves(workers)
+
+                if observer is not None:
+                    find_neighborhood_end = perf_counter()
+            self.neighbors += neighbors_number
+
+            if len(moves) > 0:
+                if observer is not None:
+                    tabu_end = perf_counter()
+
+                # Create only the best neighbor
+                best_move = find_best_schedule(moves)
+                if candidate_list is None:
+                    current_schedule = current_schedule.apply_move(best_move)
+                else:
+                    current_schedule.change_day_type_in_place(best_move.day_index, best_move.day_type, best_move.score)
+                    candidate_list.update(current_schedule, best_move.day_index)
+                if workers is not None:
+                    for _, connection in workers:
+                        connection.send(best_move)
                 if current_schedule.score.penalty < best_schedule.score.penalty or (
                         current_schedule.score.penalty == best_schedule.score.penalty and
                         current_schedule.score.total < best_schedule.score.total):
                     not_improved_counter = -1
-                    best_schedule = current_schedule
+                    best_schedule = current_schedule if candidate_list is None else current_schedule.copy()
+                    improved = True
+                else:
+                    improved = False
 
                 not_improved_counter += 1
 
-                if best_schedule.score.penalty == 0 and not_improved_counter >= self.limit_not_improved:
-                    return best_schedule
+                if observer is not None:
+                    evaluate_end = perf_counter()
+
+                self.update_memory(best_move, count)
+                finished = best_schedule.score.penalty == 0 and not_improved_counter >= self.limit_not_improved
 
-                tabu_list.append(current_schedule)
+                if observer is not None:
+                    iteration_end = perf_counter()
+                    observer.on_iteration(self, IterationStats(
+                        count, neighbors_number, rejected, 1,
+                        find_neighborhood_end - iteration_start, evaluate_end - tabu_end,
+                        (tabu_end - find_neighborhood_end) + (iteration_end - evaluate_end),
+                        current_schedule.score, best_schedule.score, iteration_end - search_start))
 
-                if len(tabu_list) > self.tabu_size:
-                    tabu_list = tabu_list[1:]
+                if improved:
+                    yield best_schedule, best_schedule.score
+                if finished:
+                    break
             else:
                 break
             count += 1
-        print(f"Search iterations number: {count}")
+
+        self.iterations = count
+        if self.verbose and not finished:
+            print(f"Search iterations number: {count}")
+        if observer is not None:
+            observer.on_end(self, best_schedule)
+
+
+class AdaptiveTabuSearch(TabuSearch):
+    """
+    Tabu Search with the tabu tenure on the changed days. A changed day cannot be changed again for the number of
+    iterations given by the tenure, unless the move gives a Schedule better than the best one (aspiration). The tenure
+    grows when the search returns to an already visited Schedule, and shrinks when it doesn't for a while. Besides the
+    moves of 'TabuSearch', days off at the ends of sequences can be changed back to working days, so the search can
+    leave Schedules without improving moves.
+    """
+
+    def __init__(self, tabu_list_size, max_iterations, limit_not_improved, tenure=ADAPTIVE_TABU_TENURE, verbose=True,
+                 observer=None, should_stop=None, deadline=None, transposition_table=None):
+        """
+        Init method.
+        :param tabu_list_size: number of visited Schedules remembered to detect cycles
+        :param max_iterations: max number of iterations to perform search
+        :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+        :param tenure: initial number of iterations a changed day is tabu
+        :param verbose: print search info
+        :param observer: Search Observer notified about the search progress
+        :param should_stop: function checked before each iteration, the search is cancelled when it returns True
+        :param deadline: max search time in milliseconds
+        :param transposition_table: Transposition Table with moves of the already seen Schedules, see 'cache.py'
+        """
+        super().__init__(tabu_list_size, max_iterations, limit_not_improved, verbose, observer, should_stop, deadline,
+                         transposition_table)
+        self.tenure = tenure
+        # Tenure of the last search, changed by 'update_memory' during the search
+        self.final_tenure = tenure
+
+    @staticmethod
+    def find_moves(schedule, fingerprint=None):
+        """
+        Find the moves of 'TabuSearch', and the moves that change days off back to working days.
+        :param schedule: the schedule
+        :param fingerprint: fingerprint of the Schedule, if already calculated
+        :return:
+        """
+        fingerprint = fingerprint or schedule.fingerprint
+        return schedule.find_moves(fingerprint) + schedule.moves_new_working_days(fingerprint)
+
+    def start_memory(self, initial_schedule):
+        """
+        Reset the tenure, the tabu days, and the visited Schedules used to detect cycles.
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+        self.final_tenure = self.tenure
+        self.max_tenure = max(self.tenure, initial_schedule.num_days // 2)
+        # Index of the iteration from which each day can be changed again
+        self.tabu_until = [0] * initial_schedule.num_days
+        self.visited_set = {initial_schedule.fingerprint}
+        self.visited_queue = deque(self.visited_set)
+        self.last_tenure_change = 0
+
+    def find_neighborhood(self, schedule, candidate_list):
+        if self.transposition_table is None:
+            return self.find_moves(schedule)
+        return schedule.find_moves_cached(self.transposition_table, self.find_moves)
+
+    def allowed_moves(self, moves, best_schedule, iteration):
+        """
+        Filter the moves of the tabu days. Tabu moves are allowed if they give a Schedule better than the best one, and
+        if all moves are tabu, the ones that will be allowed first are used.
+        :param moves: moves to the neighbors
+        :param best_schedule: the best schedule found so far
+        :param iteration: index of the iteration
+        :return: list of the allowed moves
+        """
+        if not moves:
+            return moves
+        tabu_until = self.tabu_until
+        best_score = (best_schedule.score.penalty, best_schedule.score.total)
+        allowed_moves = [move for move in moves if tabu_until[move.day_index] <= iteration or
+                         (move.score.penalty, move.score.total) < best_score]
+        if not allowed_moves:
+            first_allowed = min(tabu_until[move.day_index] for move in moves)
+            allowed_moves = [move for move in moves if tabu_until[move.day_index] == first_allowed]
+        return allowed_moves
+
+    def update_memory(self, move, iteration):
+        """
+        Make the changed day tabu. Grow the tenure if the search cycles, and shrink it if it hasn't cycled for twice the
+        tenure.
+        :param move: the applied move
+        :param iteration: index of the iteration
+        :return:
+        """
+        tenure = self.final_tenure
+        self.tabu_until[move.day_index] = iteration + 1 + tenure
+        if move.fingerprint in self.visited_set:
+            self.final_tenure = min(int(tenure * ADAPTIVE_TENURE_INCREASE) + 1, self.max_tenure)
+            self.last_tenure_change = iteration
+        else:
+            self.visited_set.add(move.fingerprint)
+            self.visited_queue.append(move.fingerprint)
+            if len(self.visited_queue) > self.tabu_size:
+                self.visited_set.discard(self.visited_queue.popleft())
+            if iteration - self.last_tenure_change > 2 * tenure:
+                self.final_tenure = max(int(tenure * ADAPTIVE_TENURE_DECREASE), 1)
+                self.last_tenure_change = iteration
+
+
+class RandomMoveSearch(Search):
+    """
+    Base class of the searches with random moves. In each iteration the type of one random day is changed; the move is
+    scored by 'Schedule.score_delta' and applied if 'accept' allows it, so neighborhoods are not built. The total score
+    is minimized, penalties are much larger than the bonus of one working day.
+    """
+
+    def __init__(self, max_iterations=RANDOM_SEARCH_MAX_ITERATIONS,
+                 limit_not_improved=RANDOM_SEARCH_LIMIT_NOT_IMPROVED, seed=None, verbose=True, observer=None,
+                 should_stop=None, deadline=None):
+        """
+        Init method.
+        :param max_iterations: max number of iterations to perform search
+        :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+        :param seed: seed of the random moves, the search is not reproducible if None
+        :param verbose: print search info
+        :param observer: Search Observer notified about the search progress
+        :param should_stop: function checked before each iteration, the search is cancelled when it returns True
+        :param deadline: max search time in milliseconds
+        """
+        super().__init__(max_iterations, limit_not_improved, verbose, observer, should_stop, deadline)
+        self.seed = seed
+        self.random = None
+
+    def start(self, initial_schedule):
+        """
+        Prepare the acceptance criterion, called before the first iteration.
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+
+    @abstractmethod
+    def accept(self, delta, current_total, iteration):
+        """
+        Check if the move is applied.
+        :param delta: difference of the total score after the move
+        :param current_total: total score of the current Schedule
+        :param iteration: index of the iteration
+        :return:
+        """
+        raise NotImplementedError('Method not implemented.')
+
+    def search(self, initial_schedule: Schedule):
+        """
+        The search with random moves.
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+        count = 0
+        self.neighbors = 0
+        self.cancelled = False
+        self.timed_out = False
+        self.random = random.Random(self.seed)
+        best_schedule = initial_schedule
+        # The current Schedule and its index of sequences are changed in place, copies have their own index
+        current_schedule = initial_schedule.copy()
+        mutable_days = [i for i, fixed in enumerate(current_schedule.fixed_days_off) if not fixed]
+        self.start(current_schedule)
+
+        observer = self.observer
+        if observer is not None:
+            observer.on_start(self, initial_schedule)
+            search_start = perf_counter()
+
+        should_stop = self.should_stop
+        deadline_time = perf_counter() + self.deadline / 1000 if self.deadline is not None else None
+        not_improved_counter = 0
+        finished = False
+        while count <= self.max_iterations and mutable_days:
+            if should_stop is not None and should_stop():
+                self.cancelled = True
+                break
+            if deadline_time is not None and perf_counter() >= deadline_time:
+                self.timed_out = True
+                break
+
+            if observer is not None:
+                iteration_start = perf_counter()
+
+            day_index = self.random.choice(mutable_days)
+            new_day_type = DayType.WORKING_DAY - current_schedule.day_types[day_index]
+            penalty, bonus = current_schedule.score_delta(day_index, new_day_type)
+            self.neighbors += 1
+
+            if observer is not None:
+                find_neighborhood_end = perf_counter()
+
+            copies = 0
+            accepted = self.accept(penalty - bonus, current_schedule.score.total, count)
+            if accepted:
+                score = current_schedule.score
+                current_schedule.change_day_type_in_place(
+                    day_index, new_day_type, ScheduleScore(score.penalty + penalty, score.bonus + bonus))
+                if current_schedule.score.penalty < best_schedule.score.penalty or (
+                        current_schedule.score.penalty == best_schedule.score.penalty and
+                        current_schedule.score.total < best_schedule.score.total):
+                    not_improved_counter = -1
+                    best_schedule = current_schedule.copy()
+                    copies = 1
+            not_improved_counter += 1
+
+            if observer is not None:
+                iteration_end = perf_counter()
+                observer.on_iteration(self, IterationStats(
+                    count, 1, 0 if accepted else 1, copies, find_neighborhood_end - iteration_start,
+                    iteration_end - find_neighborhood_end, 0, current_schedule.score, best_schedule.score,
+                    iteration_end - search_start))
+
+            if best_schedule.score.penalty == 0 and not_improved_counter >= self.limit_not_improved:
+                finished = True
+                break
+            count += 1
+
+        self.iterations = count
+        if self.verbose and not finished:
+            print(f"Search iterations number: {count}")
+        if observer is not None:
+            observer.on_end(self, best_schedule)
+        return best_schedule
+
+
+class SimulatedAnnealingSearch(RandomMoveSearch):
+    """
+    Simulated Annealing. Moves that don't make the Schedule worse are always applied, worse moves are applied with
+    probability exp(-delta / temperature). The temperature falls geometrically from the initial to the final one over
+    max_iterations.
+    """
+
+    def __init__(self, max_iterations=RANDOM_SEARCH_MAX_ITERATIONS,
+                 limit_not_improved=RANDOM_SEARCH_LIMIT_NOT_IMPROVED, initial_temperature=ANNEALING_INITIAL_TEMPERATURE,
+                 final_temperature=ANNEALING_FINAL_TEMPERATURE, seed=None, verbose=True, observer=None,
+                 should_stop=None, deadline=None):
+        """
+        Init method.
+        :param max_iterations: max number of iterations to perform search
+        :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+        :param initial_temperature: temperature of the first iteration
+        :param final_temperature: temperature of the last iteration
+        :param seed: seed of the random moves, the search is not reproducible if None
+        :param verbose: print search info
+        :param observer: Search Observer notified about the search progress
+        :param should_stop: function checked before each iteration, the search is cancelled when it returns True
+        :param deadline: max search time in milliseconds
+        """
+        super().__init__(max_iterations, limit_not_improved, seed, verbose, observer, should_stop, deadline)
+        assert 0 < final_temperature <= initial_temperature, \
+            "'final_temperature' must be positive and not greater than 'initial_temperature'"
+        self.initial_temperature = initial_temperature
+        self.final_temperature = final_temperature
+
+    def accept(self, delta, current_total, iteration):
+        if delta <= 0:
+            return True
+        temperature = self.initial_temperature * \
+            (self.final_temperature / self.initial_temperature) ** (iteration / max(self.max_iterations, 1))
+        return self.random.random() < math.exp(-delta / temperature)
+
+
+class LateAcceptanceSearch(RandomMoveSearch):
+    """
+    Late Acceptance Hill Climbing. The move is applied if the Schedule doesn't get worse, or if it's not worse than the
+    current Schedule was 'history_length' iterations ago.
+    """
+
+    def __init__(self, max_iterations=RANDOM_SEARCH_MAX_ITERATIONS,
+                 limit_not_improved=RANDOM_SEARCH_LIMIT_NOT_IMPROVED, history_length=LATE_ACCEPTANCE_LENGTH,
+                 seed=None, verbose=True, observer=None, should_stop=None, deadline=None):
+        """
+        Init method.
+        :param max_iterations: max number of iterations to perform search
+        :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+        :param history_length: number of iterations after which the total score of the current Schedule is used to
+                               accept moves
+        :param seed: seed of the random moves, the search is not reproducible if None
+        :param verbose: print search info
+        :param observer: Search Observer notified about the search progress
+        :param should_stop: function checked before each iteration, the search is cancelled when it returns True
+        :param deadline: max search time in milliseconds
+        """
+        super().__init__(max_iterations, limit_not_improved, seed, verbose, observer, should_stop, deadline)
+        assert history_length > 0, "'history_length' must be positive"
+        self.history_length = history_length
+        self.history = []
+
+    def start(self, initial_schedule):
+        self.history = [initial_schedule.score.total] * self.history_length
+
+    def accept(self, delta, current_total, iteration):
+        total = current_total + delta
+        position = iteration % self.history_length
+        accepted = delta <= 0 or total <= self.history[position]
+        self.history[position] = total if accepted else current_total
+        return accepted
+
+
+class DynamicProgrammingSearch(Search):
+    """
+    Exact search. The penalty depends only on the lengths of consecutive days sequences and on the day of the week, so
+    the best Schedule is found by dynamic programming over states (type of the current sequence, its length, length of
+    the working days sequence before it). The found Schedule has the min penalty, and the max bonus for that penalty.
+    Lengths are capped, so there are O(max_off x max_working) states per day, and the search takes
+    O(num_days x max_off x max_working) time.
+    """
+
+    def __init__(self, verbose=True, observer=None):
+        super().__init__(0, 0, verbose, observer)
+
+    def search(self, initial_schedule: Schedule):
+        """
+        Find the best Schedule with the same params and predefined days off as the initial schedule.
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+        if self.observer is not None:
+            self.observer.on_start(self, initial_schedule)
+        day_types, _ = self.solve(initial_schedule, initial_schedule.fixed_days_off, initial_schedule.invalid_days_off)
+        best_schedule = initial_schedule.copy()
+        best_schedule.day_types = bytearray(day_types)
+        best_schedule.update_schedule()
+        self.iterations = initial_schedule.num_days
+        if self.verbose:
+            print(f"Search iterations number: {self.iterations}")
+        if self.observer is not None:
+            self.observer.on_end(self, best_schedule)
+        return best_schedule
+
+    @staticmethod
+    def state_after(schedule, day_index):
+        """
+        Get the state of the Schedule after the day, in the same form as in 'solve'.
+        :param schedule: the schedule
+        :param day_index: index of the day
+        :return:
+        """
+        cap_working = max(schedule.max_working, schedule.min_working) + 1
+        cap_off = max(schedule.max_off, schedule.min_off) + 1
+        run_start = schedule.run_starts[day_index]
+        if schedule.day_types[day_index] == DayType.WORKING_DAY:
+            return DayType.WORKING_DAY, min(day_index - run_start + 1, cap_working), 0
+        working_days = schedule.cons_days_number(run_start - 1) if run_start > 0 else 0
+        return DayType.DAY_OFF, min(day_index - run_start + 1, cap_off), min(working_days, cap_working)
+
+    def repair(self, schedule, start, stop):
+        """
+        Find the best day types for the days from 'start' to 'stop', keeping the days before and after them. If the
+        days after cannot be kept, the range is doubled until they can, or until it reaches the end of the Schedule.
+        :param schedule: the schedule, changed in place
+        :param start: index of the first day
+        :param stop: index after the last day
+        :return:
+        """
+        while True:
+            initial_state = self.state_after(schedule, start - 1) if start > 0 else None
+            final_state = self.state_after(schedule, stop - 1) if stop < schedule.num_days else None
+            day_types, _ = self.solve(schedule, schedule.fixed_days_off, schedule.invalid_days_off, start, stop,
+                                      initial_state, final_state)
+            if day_types is not None:
+                break
+            stop = min(stop + (stop - start), schedule.num_days)
+        schedule.day_types[start:stop] = bytes(day_types)
+        schedule.invalidate()
+
+    @staticmethod
+    def next_state(state, day_type, cap_working, cap_off):
+        """
+        Get the state after adding the day, in the same form as in 'solve'.
+        :param state: the state before the day, None for the first day
+        :param day_type: type of the day
+        :param cap_working: max length of working days sequence in the state
+        :param cap_off: max length of days off sequence in the state
+        :return:
+        """
+        if state is None:
+            return day_type, 1, 0
+        current_type, length, working_days = state
+        if day_type == current_type:
+            return day_type, min(length + 1, cap_working if day_type == DayType.WORKING_DAY else cap_off), working_days
+        if day_type == DayType.DAY_OFF:
+            return DayType.DAY_OFF, 1, length
+        return DayType.WORKING_DAY, 1, 0
+
+    @staticmethod
+    def under_min(length, max_days, min_days):
+        """
+        Get the number of days the sequence is under the min limit. Sequences over the max limit are not checked.
+        :return:
+        """
+        return min_days - length if length <= max_days and length < min_days else 0
+
+    def solve(self, schedule, fixed_days_off, invalid_days_off, start=0, stop=None, initial_state=None,
+              final_state=None):
+        """
+        Find the best day types for the days from 'start' to 'stop'.
+        :param schedule: the schedule with params
+        :param fixed_days_off: sequence with 1 at the index of each immutable day off
+        :param invalid_days_off: sequence with 1 at the index of each day that is penalized if it's working day
+        :param start: index of the first day
+        :param stop: index after the last day, number of days in the schedule if None
+        :param initial_state: state before the first day, (type of the sequence, its length, length of the working days
+                              sequence before it); the first day starts the schedule if None
+        :param final_state: required state after the last day, the best state is used if None
+        :return: list of day types and the state after the last day, None if the final state cannot be reached
+        """
+        if stop is None:
+            stop = schedule.num_days
+        max_working, min_working = schedule.max_working, schedule.min_working
+        max_off, min_off = schedule.max_off, schedule.min_off
+        # Lengths over the caps don't change the penalty of adding a day, so the number of states is limited
+        cap_working = max(max_working, min_working) + 1
+        cap_off = max(max_off, min_off) + 1
+        # Penalty and bonus are combined, so that the penalty is minimized first
+        penalty_weight = stop - start + 1
+
+        # Cost and previous state for each state of the current day
+        states = {initial_state: 0}
+        history = []
+        for i in range(start, stop):
+            day_penalty = PENALTY_INVALID_DAY_OFF if invalid_days_off[i] else 0
+            new_states = {}
+            previous = {}
+            for state, cost in states.items():
+                candidates = []
+                if state is None:
+                    # The first day. If the first day is day off, the first block has 0 working days
+                    candidates.append(((DayType.WORKING_DAY, 1, 0), max_working < 1))
+                    candidates.append(((DayType.DAY_OFF, 1, 0), max_off < 1))
+                else:
+                    day_type, length, working_days = state
+                    if day_type == DayType.WORKING_DAY:
+                        candidates.append(((DayType.WORKING_DAY, min(length + 1, cap_working), 0),
+                                           length >= max_working))
+                        candidates.append(((DayType.DAY_OFF, 1, length), max_off < 1))
+                    else:
+                        candidates.append(((DayType.DAY_OFF, min(length + 1, cap_off), working_days),
+                                           length >= max_off))
+                        # A new block starts, so the previous one is not the last and the min limits are checked
+                        closed_block = self.under_min(working_days, max_working, min_working) + \
+                            self.under_min(length, max_off, min_off)
+                        candidates.append(((DayType.WORKING_DAY, 1, 0), closed_block + (max_working < 1)))
+
+                for new_state, consecutive_days in candidates:
+                    if new_state[0] == DayType.WORKING_DAY:
+                        if fixed_days_off[i]:
+                            continue
+                        penalty = PENALTY_INVALID_CONSECUTIVE_DAYS * consecutive_days + day_penalty
+                        new_cost = cost + penalty * penalty_weight - 1
+                    else:
+                        new_cost = cost + PENALTY_INVALID_CONSECUTIVE_DAYS * consecutive_days * penalty_weight
+
+                    if new_state not in new_states or new_cost < new_states[new_state]:
+                        new_states[new_state] = new_cost
+                        previous[new_state] = state
+            states = new_states
+            history.append(previous)
+
+        # Go back from the best final state
+        if final_state is None:
+            final_state = min(states, key=states.get)
+        elif final_state not in states:
+            return None, None
+        state = final_state
+        day_types = []
+        for previous in reversed(history):
+            day_types.append(state[0])
+            state = previous[state]
+        day_types.reverse()
+        return day_types, final_state
+
+
+class PeriodicSearch(Search):
+    """
+    Search for a Schedule that repeats every 7 * k days. Predefined days off repeat every week, so the best cycle is
+    found and tiled across the whole Schedule. Cycles are found by dynamic programming, where the state after the last
+    day of the cycle must be the same as the state before its first day, so the constraints are checked where cycles
+    meet. If no valid cycle is found, the fallback search is performed on the whole Schedule.
+    """
+
+    def __init__(self, fallback_search, max_weeks=PERIODIC_MAX_WEEKS, verbose=True, observer=None):
+        """
+        Init method.
+        :param fallback_search: the search used if there is no valid cycle
+        :param max_weeks: max number of weeks in the cycle
+        :param verbose: print search info
+        :param observer: Search Observer notified about the search progress
+        """
+        super().__init__(fallback_search.max_iterations, fallback_search.limit_not_improved, verbose, observer)
+        self.fallback_search = fallback_search
+        self.max_weeks = max_weeks
+        # Number of weeks in the cycle of the last search, None if the whole Schedule was searched
+        self.cycle_weeks = None
+
+    def find_cycle(self, schedule, weeks):
+        """
+        Find the best cycle without penalty. The state before the first day of the cycle is the state after its last
+        day, except for the first cycle which has no days before it, so two cycles are evaluated as a Schedule.
+        :param schedule: the schedule with params
+        :param weeks: number of weeks in the cycle
+        :return: list of day types, None if there is no valid cycle
+        """
+        dp = DynamicProgrammingSearch(verbose=False)
+        cycle_days = 7 * weeks
+        # Predefined days off, the first day of the cycle is not excluded since it is not the first day of later cycles
+        fixed_days_off = invalid_day_off_mask(cycle_days, tuple(schedule.days_off))
+        invalid_days_off = invalid_day_off_mask(cycle_days, tuple(schedule.days_off))
+        cap_working = max(schedule.max_working, schedule.min_working) + 1
+        cap_off = max(schedule.max_off, schedule.min_off) + 1
+
+        states = [(DayType.WORKING_DAY, length, 0) for length in range(1, cap_working + 1)]
+        states += [(DayType.DAY_OFF, length, working_days)
+                   for length in range(1, cap_off + 1) for working_days in range(1, cap_working + 1)]
+
+        best_cycle = None
+        for state in states:
+            cycle, _ = dp.solve(schedule, fixed_days_off, invalid_days_off, 0, cycle_days, initial_state=state,
+                                final_state=state)
+            if cycle is None:
+                continue
+            tiled_cycle = Schedule([cycle_days * 2, schedule.max_working, schedule.min_working,
+                                    schedule.max_off, schedule.min_off, schedule.days_off], days=cycle * 2)
+            if tiled_cycle.score.penalty == 0 and (best_cycle is None or sum(cycle) > sum(best_cycle)):
+                best_cycle = cycle
+        return best_cycle
+
+    def search(self, initial_schedule: Schedule):
+        """
+        Find the best cycle and tile it across the Schedule.
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+        self.cycle_weeks = None
+        self.iterations = 0
+        self.neighbors = 0
+        self.cancelled = False
+        self.timed_out = False
+        best_schedule = None
+        # Cycles can be used only if predefined days off repeat every week
+        if not initial_schedule.custom_days_off:
+            for weeks in range(1, self.max_weeks + 1):
+                if 7 * weeks > initial_schedule.num_days:
+                    break
+                cycle = self.find_cycle(initial_schedule, weeks)
+                self.iterations += 1
+                if cycle is None:
+                    continue
+
+                tiled_schedule = initial_schedule.copy()
+                tiled_schedule.day_types = bytearray((cycle * -(-initial_schedule.num_days // len(cycle)))
+                                                     [:initial_schedule.num_days])
+                tiled_schedule.update_schedule()
+                if tiled_schedule.score.penalty == 0 and (
+                        best_schedule is None or tiled_schedule.score.total < best_schedule.score.total):
+                    best_schedule = tiled_schedule
+                    self.cycle_weeks = weeks
+
+        if best_schedule is None:
+            best_schedule = self.fallback_search.search(initial_schedule)
+            self.iterations += self.fallback_search.iterations
+            self.neighbors += self.fallback_search.neighbors
+            self.cancelled = self.fallback_search.cancelled
+            self.timed_out = self.fallback_search.timed_out
+        else:
+            if self.verbose:
+                print(f"Cycle weeks number: {self.cycle_weeks}")
+            if self.observer is not None:
+                self.observer.on_start(self, initial_schedule)
+                self.observer.on_end(self, best_schedule)
+        return best_schedule
+
+
+# Stop event of the multi-start search, set in each worker process of the pool
+_stop_event = None
+
+
+def _init_multi_start_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _run_multi_start(initial_schedule, tabu_list_size, max_iterations, limit_not_improved, end_time):
+    """
+    Run one Tabu search of the multi-start search, in the worker process. If the search finds a Schedule without
+    penalty, other searches are cancelled.
+    :param initial_schedule: the initial schedule
+    :param tabu_list_size: size of the tabu list
+    :param max_iterations: max number of iterations to perform search
+    :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+    :param end_time: time in seconds since the epoch when the whole multi-start search must end, None if not limited
+    :return: the best Schedule, number of iterations, number of neighbors, and whether the deadline was reached; the
+             Schedule is None if the search starts after the end time
+    """
+    deadline = None
+    if end_time is not None:
+        deadline = (end_time - time()) * 1000
+        if deadline <= 0:
+            return None, 0, 0, True
+    search = TabuSearch(tabu_list_size, max_iterations, limit_not_improved, verbose=False,
+                        should_stop=_stop_event.is_set, deadline=deadline)
+    best_schedule = search.search(initial_schedule)
+    if not search.cancelled and best_schedule.score.penalty == 0:
+        _stop_event.set()
+    return best_schedule, search.iterations, search.neighbors, search.timed_out
+
+
+class MultiStartSearch(Search):
+    """
+    Multi-start Tabu Search. Tabu searches are run from different initial schedules on the pool of processes. When one
+    of them finds a schedule without penalty, the others are cancelled, and the best schedule is returned.
+    """
+
+    def __init__(self, tabu_list_size, max_iterations, limit_not_improved, starts=MULTI_START_NUMBER, workers=None,
+                 seed=0, verbose=True, observer=None, deadline=None):
+        """
+        Init method.
+        :param tabu_list_size: size of the tabu list
+        :param max_iterations: max number of iterations of each search
+        :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+        :param starts: number of initial schedules
+        :param workers: number of processes, number of CPUs if None
+        :param seed: seed of the random initial schedules
+        :param verbose: print search info
+        :param observer: Search Observer notified about the search start and end
+        :param deadline: max time of the whole search in milliseconds, searches that would start after it are skipped
+        """
+        super().__init__(max_iterations, limit_not_improved, verbose, observer, deadline=deadline)
+        self.tabu_size = tabu_list_size
+        self.starts = starts
+        self.workers = workers
+        self.seed = seed
+        # Index of the initial schedule of the best Schedule found by the last search
+        self.best_start = None
+
+    def initial_schedules(self, initial_schedule):
+        """
+        Create the initial schedules. The first one is the given schedule, built from the predefined days off. The
+        others add one day off after each max working days, shifted by one day for each schedule, or days off at
+        random days. Days off are added only if they don't violate the min_working and max_off constraints, since the
+        neighborhood never removes them.
+        :param initial_schedule: the initial schedule
+        :return: list of initial schedules
+        """
+        schedules = [initial_schedule]
+        period = initial_schedule.max_working + max(initial_schedule.min_off, 1)
+        for i in range(1, self.starts):
+            if i % 2:
+                day_indices = range((i // 2) % period, initial_schedule.num_days, period)
+            else:
+                day_indices = random.Random(self.seed + i).sample(range(initial_schedule.num_days),
+                                                                  initial_schedule.num_days // period)
+
+            schedule = initial_schedule.copy()
+            for day_index in day_indices:
+                if not schedule.change_day_types([(day_index, DayType.DAY_OFF)]):
+                    continue
+                if schedule.short_working_blocks > 0 or schedule.cons_days_number(day_index) > schedule.max_off:
+                    schedule.change_day_types([(day_index, DayType.WORKING_DAY)])
+            schedules.append(schedule)
+        return schedules
+
+    def search(self, initial_schedule: Schedule):
+        """
+        Run the Tabu searches from all initial schedules.
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+        self.iterations = 0
+        self.neighbors = 0
+        self.timed_out = False
+        if self.observer is not None:
+            self.observer.on_start(self, initial_schedule)
+
+        best_schedule = None
+        # The deadline bounds the whole search, so searches waiting for a free process get the rest of it
+        end_time = time() + self.deadline / 1000 if self.deadline is not None else None
+        stop_event = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_multi_start_worker,
+                                 initargs=(stop_event,)) as executor:
+            futures = {executor.submit(_run_multi_start, schedule, self.tabu_size, self.max_iterations,
+                                       self.limit_not_improved, end_time): i
+                       for i, schedule in enumerate(self.initial_schedules(initial_schedule))}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                schedule, iterations, neighbors, timed_out = future.result()
+                self.iterations += iterations
+                self.neighbors += neighbors
+                self.timed_out = self.timed_out or timed_out
+                if schedule is None:
+                    continue
+                start = futures[future]
+                # Ties are broken by the index of the initial schedule
+                if best_schedule is None or (schedule.score.penalty, schedule.score.total, start) < \
+                        (best_schedule.score.penalty, best_schedule.score.total, self.best_start):
+                    best_schedule = schedule
+                    self.best_start = start
+
+                # Searches that have not started yet are not needed
+                if stop_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+
+        # All searches were skipped if the deadline was reached before the first one started
+        if best_schedule is None:
+            best_schedule = initial_schedule
+        if self.verbose:
+            print(f"Search iterations number: {self.iterations}, best start: {self.best_start}")
+        if self.observer is not None:
+            self.observer.on_end(self, best_schedule)
         return best_schedule
 
 
@@ -496,9 +2149,20 @@ def check_params(params):
     :param params: the params
     :return:
     """
+    assert isinstance(params, dict), f"params must be an object, but got {params!r}"
+    missing = [name for name in PARAM_NAMES if name not in params]
+    assert not missing, f"params {missing} are missing"
+    for name in PARAM_NAMES[:-1]:
+        assert isinstance(params[name], int) and not isinstance(params[name], bool) and params[name] >= 0, \
+            f"'{name}' must be a non-negative integer, but got {params[name]!r}"
+    assert isinstance(params['days_off'], list) and all(
+        isinstance(day, int) and not isinstance(day, bool) and 0 <= day <= 7 for day in params['days_off']), \
+        f"'days_off' must be a list of week days from 1 (Monday) to 7 (Sunday, also 0), but got {params['days_off']!r}"
+    assert params['num_days'] > 0, "'num_days' must be greater than 0"
+
     min_w = params['min_working']
     min_o = params['min_off']
-    days_off = params['days_off']
+    days_off = normalize_days_off(params['days_off'])
     if not days_off:
         return
 
@@ -518,21 +2182,440 @@ def check_params(params):
                         f"'min_working_days' is {min_w}, but days off are {[DAY_NAME[do] for do in days_off]}"
 
 
-def perform_tabu_search(params):
+@lru_cache(maxsize=FEASIBILITY_CACHE_SIZE)
+def zero_penalty_exists(num_days, max_working, min_working, max_off, min_off, days_off):
     """
-    For a given params, find the best Schedule.
+    Check whether a Schedule without penalty exists. The days that must be days off depend only on the day of the
+    week, so the sets of reachable states (type of the current sequence, its length, length of the working days
+    sequence before it) repeat after a few weeks, and the days after the first repetition are not visited.
+    :param num_days: total number of days
+    :param max_working: max consecutive working days
+    :param min_working: min consecutive working days
+    :param max_off: max consecutive days off
+    :param min_off: min consecutive days off
+    :param days_off: tuple of predefined days off
+    :return:
+    """
+    # Working days on predefined days off are penalized, see 'fixed_days_off_mask' and 'invalid_day_off_mask'
+    days_off_week = invalid_day_off_mask(7, days_off)
+
+    states = {None}
+    history = []
+    seen = {}
+    for i in range(num_days):
+        new_states = set()
+        working_allowed = not days_off_week[i % 7] and max_working >= 1
+        for state in states:
+            if state is None:
+                if working_allowed:
+                    new_states.add((DayType.WORKING_DAY, 1, 0))
+                if max_off >= 1:
+                    new_states.add((DayType.DAY_OFF, 1, 0))
+                continue
+
+            day_type, length, working_days = state
+            if day_type == DayType.WORKING_DAY:
+                if working_allowed and length < max_working:
+                    new_states.add((DayType.WORKING_DAY, length + 1, 0))
+                if max_off >= 1:
+                    new_states.add((DayType.DAY_OFF, 1, length))
+            else:
+                if length < max_off:
+                    new_states.add((DayType.DAY_OFF, length + 1, working_days))
+                # A new block starts, so the previous one must have at least min days
+                if working_allowed and working_days >= min_working and length >= min_off:
+                    new_states.add((DayType.WORKING_DAY, 1, 0))
+        if not new_states:
+            return False
+
+        states = frozenset(new_states)
+        key = (i % 7, states)
+        if key in seen:
+            # States repeat with the period of 'i - seen[key]' days
+            first = seen[key]
+            return bool(history[first + (num_days - 1 - first) % (i - first)])
+        seen[key] = i
+        history.append(states)
+    return True
+
+
+def find_blocking_constraints(params):
+    """
+    Find the constraints that prevent a Schedule without penalty. Each constraint is relaxed one at a time, and it's
+    blocking if a Schedule without penalty exists when it's relaxed.
+    :param params: the params
+    :return: None if a Schedule without penalty exists, else list of blocking constraint names, empty if only a
+             combination of constraints is blocking
+    """
+    num_days, max_working, min_working, max_off, min_off, days_off = get_schedule_params(params)
+    # The default day off is added in the same way as for the Schedule
+    if min_off > 0 and len(days_off) == 0:
+        days_off.append(DEFAULT_DAY_OFF)
+    days_off = tuple(sorted(days_off))
+
+    if zero_penalty_exists(num_days, max_working, min_working, max_off, min_off, days_off):
+        return None
+
+    relaxed = {
+        'max_working': (num_days, num_days, min_working, max_off, min_off, days_off),
+        'min_working': (num_days, max_working, 0, max_off, min_off, days_off),
+        'max_off': (num_days, max_working, min_working, num_days, min_off, days_off),
+        'min_off': (num_days, max_working, min_working, max_off, 0, days_off),
+        'days_off': (num_days, max_working, min_working, max_off, min_off, ()),
+    }
+    return [name for name, relaxed_params in relaxed.items() if zero_penalty_exists(*relaxed_params)]
+
+
+def check_feasibility(params):
+    """
+    Check whether a Schedule without penalty exists for the params, so that the search is not run for params which
+    can only have Schedules with penalty.
+    :param params: the params
+    :return:
+    """
+    blocking = find_blocking_constraints(params)
+    if blocking is None:
+        return
+    if not blocking:
+        raise AssertionError('There is no schedule without penalty, it is prevented by a combination of constraints')
+    # The default day off is used if there isn't predefined day off
+    days_off = params['days_off'] or ([DEFAULT_DAY_OFF] if params['min_off'] > 0 else [])
+    days_off = [DAY_NAME[day_off] for day_off in days_off]
+    raise AssertionError('There is no schedule without penalty, it is prevented by ' + ' or '.join(
+        f"'{name}' {days_off if name == 'days_off' else params[name]}" for name in blocking))
+
+
+def get_schedule_params(params):
+    """
+    Get the list of Schedule params from the params dictionary.
+    :param params: the params
+    :return: params list in the order expected by Schedule
+    """
+    return [params['num_days'], params['max_working'], params['min_working'], params['max_off'], params['min_off'],
+            normalize_days_off(params['days_off'])]
+
+
+def select_engine(params):
+    """
+    Choose the search algorithm for the params, by the number of days and the tightness of the days off constraints.
+    The tabu search is the fastest for short schedules. For long schedules, late acceptance is the fastest to find a
+    schedule without penalty, but it gets stuck when every sequence of days off must have exactly min_off days, and
+    min_off is greater than 1; simulated annealing is used then.
     :param params: the Schedule params
+    :return: name of the search algorithm
+    """
+    if params['num_days'] < SELECTOR_LONG_HORIZON:
+        return 'tabu'
+    if params['min_off'] > 1 and params['max_off'] == params['min_off']:
+        return 'annealing'
+    return 'lahc'
+
+
+def search_limits(engine, max_iterations=None, limit_not_improved=None):
+    """
+    Get the iteration limits of the search algorithm. Each iteration of the random searches is a single move, so they
+    have their own default limits.
+    :param engine: name of the algorithm, one of SEARCH_ENGINES
+    :param max_iterations: max number of iterations to perform search, the default of the engine if None
+    :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0, the default of
+                               the engine if None
+    :return: max_iterations and limit_not_improved
+    """
+    if engine in RANDOM_SEARCH_ENGINES:
+        defaults = RANDOM_SEARCH_MAX_ITERATIONS, RANDOM_SEARCH_LIMIT_NOT_IMPROVED
+    else:
+        defaults = MAX_ITERATIONS, LIMIT_NOT_IMPROVED
+    return (defaults[0] if max_iterations is None else max_iterations,
+            defaults[1] if limit_not_improved is None else limit_not_improved)
+
+
+def create_search(engine='tabu', tabu_list_size=TABU_LIST_SIZE, max_iterations=None, limit_not_improved=None,
+                  verbose=False, observer=None, starts=MULTI_START_NUMBER,
+                  workers=None, deadline=None, transposition_table=None, neighborhood_workers=None, candidates=None,
+                  seed=None):
+    """
+    Create the search algorithm.
+    :param engine: name of the algorithm, one of SEARCH_ENGINES
+    :param tabu_list_size: size of the tabu list
+    :param max_iterations: max number of iterations to perform search, the default of the engine if None, see
+                           'search_limits'
+    :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0, the default of
+                               the engine if None
+    :param verbose: print search info
+    :param observer: Search Observer notified about the search progress
+    :param starts: number of initial schedules of the multi-start search
+    :param workers: number of processes of the multi-start search, number of CPUs if None
+    :param deadline: max time of the tabu search in milliseconds, the exact searches are not limited
+    :param transposition_table: Transposition Table shared by the tabu searches, see 'cache.py'
+    :param neighborhood_workers: number of processes the neighborhood of the tabu search is split between, the
+                                 neighborhood is not split if None; only the 'tabu' and 'periodic' engines without
+                                 'candidates' split it
+    :param candidates: number of sequences with violated constraints the tabu search finds moves for in each
+                       iteration, see 'CandidateList'; all days are checked if None
+    :param seed: seed of the random sampling of the candidate sequences, and of the random moves of the annealing and
+                 late acceptance searches
+    :return:
+    """
+    if engine == 'auto':
+        raise ValueError("The 'auto' engine depends on the params, use 'select_engine' to choose the engine")
+    if neighborhood_workers is not None and engine not in ('tabu', 'periodic'):
+        raise ValueError("'neighborhood_workers' can be used only with the 'tabu' and 'periodic' engines")
+    max_iterations, limit_not_improved = search_limits(engine, max_iterations, limit_not_improved)
+    if engine == 'tabu':
+        return TabuSearch(tabu_list_size, max_iterations, limit_not_improved, verbose, observer, deadline=deadline,
+                          transposition_table=transposition_table, neighborhood_workers=neighborhood_workers,
+                          candidates=candidates, seed=seed)
+    if engine == 'dp':
+        return DynamicProgrammingSearch(verbose, observer)
+    if engine == 'periodic':
+        return PeriodicSearch(TabuSearch(tabu_list_size, max_iterations, limit_not_improved, verbose, observer,
+                                         deadline=deadline, transposition_table=transposition_table,
+                                         neighborhood_workers=neighborhood_workers, candidates=candidates, seed=seed),
+                              verbose=verbose, observer=observer)
+    if engine == 'adaptive':
+        return AdaptiveTabuSearch(tabu_list_size, max_iterations, limit_not_improved, verbose=verbose,
+                                  observer=observer, deadline=deadline, transposition_table=transposition_table)
+    if engine == 'multistart':
+        return MultiStartSearch(tabu_list_size, max_iterations, limit_not_improved, starts, workers, verbose=verbose,
+                                observer=observer, deadline=deadline)
+    if engine == 'annealing':
+        return SimulatedAnnealingSearch(max_iterations, limit_not_improved, seed=seed, verbose=verbose,
+                                        observer=observer, deadline=deadline)
+    if engine == 'lahc':
+        return LateAcceptanceSearch(max_iterations, limit_not_improved, seed=seed, verbose=verbose, observer=observer,
+                                    deadline=deadline)
+    raise ValueError(f"Unknown search engine '{engine}', expected one of {SEARCH_ENGINES}")
+
+
+def schedule_cache_key(params, tabu_list_size=TABU_LIST_SIZE, max_iterations=None, limit_not_improved=None,
+                       engine='tabu', starts=MULTI_START_NUMBER, candidates=None, seed=None, **_):
+    """
+    Get the Result Cache key of the params and the search settings that change the found Schedule. The number of
+    initial schedules is used only by the multi-start search, the candidate list only by the tabu and periodic
+    searches, and the seed only by the random searches and the candidate list. Other keyword arguments of
+    'solve_schedule' are ignored.
+    :param params: the valid Schedule params
+    :param tabu_list_size: size of the tabu list
+    :param max_iterations: max number of iterations to perform search, the default of the engine if None
+    :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0, the default of
+                               the engine if None
+    :param engine: name of the search algorithm, one of ENGINE_CHOICES
+    :param starts: number of initial schedules of the multi-start search
+    :param candidates: number of sequences with violated constraints the tabu search finds moves for in each iteration
+    :param seed: seed of the random moves of the annealing and late acceptance searches, and of the candidate list
     :return:
     """
-    max_iterations = 5000
-    limit_not_improved = 10
-    tabu_list_size = 1000
+    if engine == 'auto':
+        engine = select_engine(params)
+    max_iterations, limit_not_improved = search_limits(engine, max_iterations, limit_not_improved)
+    settings = dict(tabu_list_size=tabu_list_size, max_iterations=max_iterations,
+                    limit_not_improved=limit_not_improved, engine=engine)
+    if engine == 'multistart':
+        settings['starts'] = starts
+    if engine in ('tabu', 'periodic') and candidates is not None:
+        settings['candidates'] = candidates
+        settings['seed'] = seed
+    if engine in RANDOM_SEARCH_ENGINES:
+        settings['seed'] = seed
+    return cache_key(dict(params, days_off=normalize_days_off(params['days_off'])), **settings)
+
+
+def solve_schedule(params, tabu_list_size=TABU_LIST_SIZE, max_iterations=None, limit_not_improved=None, verbose=False,
+                   cache=None, engine='tabu', observer=None, starts=MULTI_START_NUMBER, workers=None, deadline=None,
+                   transposition_table=None, neighborhood_workers=None, candidates=None, seed=None):
+    """
+    For a given params, find the best Schedule.
+    :param params: the Schedule params
+    :param tabu_list_size: size of the tabu list
+    :param max_iterations: max number of iterations to perform search, the default of the engine if None, see
+                           'search_limits'
+    :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0, the default of
+                               the engine if None
+    :param verbose: print search info
+    :param cache: Result Cache used to return already found Schedules
+    :param engine: name of the search algorithm, one of ENGINE_CHOICES; 'auto' chooses it by the params, see
+                   'select_engine'
+    :param observer: Search Observer notified about the search progress
+    :param starts: number of initial schedules of the multi-start search
+    :param workers: number of processes of the multi-start search, number of CPUs if None
+    :param deadline: max time of the tabu search in milliseconds, the best Schedule found so far is returned when
+                     it's reached
+    :param transposition_table: Transposition Table shared by the tabu searches, see 'cache.py'; it doesn't change
+                                the found Schedule
+    :param neighborhood_workers: number of processes the neighborhood of the tabu search is split between, it doesn't
+                                 change the found Schedule
+    :param candidates: number of sequences with violated constraints the tabu search finds moves for in each
+                       iteration, see 'CandidateList'; all days are checked if None
+    :param seed: seed of the random moves of the annealing and late acceptance searches, they are not reproducible if
+                 None, and of the random sampling of the candidate sequences
+    :return: the best Schedule
+    """
+    check_params(params)
+    check_feasibility(params)
+    if engine == 'auto':
+        engine = select_engine(params)
 
-    print(params)
+    key = None
+    if cache is not None:
+        key = schedule_cache_key(params, tabu_list_size, max_iterations, limit_not_improved, engine, starts,
+                                 candidates, seed)
+        best_schedule = cache.get(key)
+        if best_schedule is not None:
+            return best_schedule
+
+    new_schedule = Schedule(get_schedule_params(params))
+
+    search = create_search(engine, tabu_list_size, max_iterations, limit_not_improved, verbose, observer, starts,
+                           workers, deadline, transposition_table, neighborhood_workers, candidates, seed)
+    best_schedule = search.search(new_schedule)
+
+    # Schedules found before the deadline could be improved by a longer search
+    if cache is not None and not search.timed_out:
+        cache.put(key, best_schedule)
+    return best_schedule
+
+
+def solve_schedule_improvements(params, tabu_list_size=TABU_LIST_SIZE, max_iterations=MAX_ITERATIONS,
+                                limit_not_improved=LIMIT_NOT_IMPROVED, verbose=False, observer=None, deadline=None):
+    """
+    For a given params, run the Tabu search and yield each new best Schedule as soon as it's found. The caller can use
+    the first good Schedule, and keep iterating to refine it.
+    :param params: the Schedule params
+    :param tabu_list_size: size of the tabu list
+    :param max_iterations: max number of iterations to perform search
+    :param limit_not_improved: max number of iterations to improve the Schedule when penalty becomes 0
+    :param verbose: print search info
+    :param observer: Search Observer notified about the search progress
+    :param deadline: max search time in milliseconds
+    :return: generator of (best Schedule, Schedule Score) pairs, the last one is the best
+    """
     check_params(params)
-    new_schedule = Schedule(params.values())
+    check_feasibility(params)
+    search = TabuSearch(tabu_list_size, max_iterations, limit_not_improved, verbose, observer, deadline=deadline)
+    yield from search.improvements(Schedule(get_schedule_params(params)))
+
+
+def resolve_schedule(schedule, add_days_off=(), remove_days_off=(), extend_days=0, window=RESOLVE_WINDOW):
+    """
+    Re-solve the solved Schedule after a small change, without searching the whole Schedule again. Only the days
+    around the change are solved again, by the exact search with the states before and after them kept.
+    :param schedule: the solved schedule, it's not changed
+    :param add_days_off: indices of the days that become predefined days off
+    :param remove_days_off: indices of the predefined days off that become mutable
+    :param extend_days: number of days added to the end of the Schedule, predefined days off are set for them
+    :param window: number of days before and after each change that are solved again
+    :return: the new Schedule
+    """
+    new_schedule = schedule.copy()
+    old_num_days = schedule.num_days
+    new_schedule.num_days += extend_days
+    fixed_days_off = bytearray(schedule.fixed_days_off)
+    invalid_days_off = bytearray(schedule.invalid_days_off)
+    if extend_days:
+        fixed_days_off += fixed_days_off_mask(new_schedule.num_days, tuple(schedule.days_off))[old_num_days:]
+        invalid_days_off += invalid_day_off_mask(new_schedule.num_days, tuple(schedule.days_off))[old_num_days:]
+        new_schedule.day_types += bytes([DayType.WORKING_DAY]) * extend_days
+    # Both masks are changed, so the removed days off can be working days without penalty
+    for day_index in add_days_off:
+        fixed_days_off[day_index] = 1
+        invalid_days_off[day_index] = 1
+        new_schedule.day_types[day_index] = DayType.DAY_OFF
+    for day_index in remove_days_off:
+        fixed_days_off[day_index] = 0
+        invalid_days_off[day_index] = 0
+    new_schedule.set_days_off_masks(fixed_days_off, invalid_days_off)
+    new_schedule.invalidate()
+
+    # Ranges of days around the changes, overlapping ranges are merged
+    ranges = [(max(day_index - window, 0), min(day_index + window + 1, new_schedule.num_days))
+              for day_index in sorted(set(add_days_off) | set(remove_days_off))]
+    if extend_days:
+        ranges.append((max(old_num_days - window, 0), new_schedule.num_days))
+    merged_ranges = []
+    for start, stop in sorted(ranges):
+        if merged_ranges and start <= merged_ranges[-1][1]:
+            merged_ranges[-1] = (merged_ranges[-1][0], max(stop, merged_ranges[-1][1]))
+        else:
+            merged_ranges.append((start, stop))
+
+    search = DynamicProgrammingSearch(verbose=False)
+    for start, stop in merged_ranges:
+        search.repair(new_schedule, start, stop)
+    return new_schedule
 
-    tabu_search = TabuSearch(tabu_list_size, max_iterations, limit_not_improved)
-    best_schedule = tabu_search.search(new_schedule)
+
+def solve_rolling_horizon(params, window=ROLLING_WINDOW, overlap=ROLLING_OVERLAP):
+    """
+    Solve the Schedule in overlapping windows, and yield the days as each window is finalized. Each window is solved by
+    the exact search starting from the state at the end of the finalized days, and its last 'overlap' days are solved
+    again with the next window. Only one window is kept in memory, so memory doesn't depend on the number of days.
+    :param params: the Schedule params
+    :param window: number of days in a window
+    :param overlap: number of days solved again with the next window
+    :return: generator of day types
+    """
+    check_params(params)
+    check_feasibility(params)
+    assert 0 <= overlap < window, f"'overlap' is {overlap}, but it must be lower than 'window' {window}"
+    num_days, max_working, min_working, max_off, min_off, days_off = get_schedule_params(params)
+    # Add the default day off in the same way as for the Schedule
+    if min_off > 0 and len(days_off) == 0:
+        days_off.append(DEFAULT_DAY_OFF)
+    days_off = tuple(days_off)
+    cap_working = max(max_working, min_working) + 1
+    cap_off = max(max_off, min_off) + 1
+
+    search = DynamicProgrammingSearch(verbose=False)
+    # Schedule of one window, used only for its params
+    window_schedule = Schedule([min(window, num_days), max_working, min_working, max_off, min_off, list(days_off)])
+    state = None
+    start = 0
+    while start < num_days:
+        length = min(window, num_days - start)
+        # Masks depend only on the day of the week, except that the first day is never immutable
+        offset = start % 7 + (7 if start > 0 else 0)
+        fixed_days_off = fixed_days_off_mask(offset + length, days_off)[offset:]
+        invalid_days_off = invalid_day_off_mask(offset + length, days_off)[offset:]
+        day_types, _ = search.solve(window_schedule, fixed_days_off, invalid_days_off, 0, length, state)
+
+        finalized = length if start + length == num_days else length - overlap
+        for day_type in day_types[:finalized]:
+            state = search.next_state(state, day_type, cap_working, cap_off)
+            yield day_type
+        start += finalized
+
+
+def optimality_gap(schedule):
+    """
+    Compare the Schedule with the best Schedule found by the exact search.
+    :param schedule: the schedule
+    :return: penalty and bonus differences between the Schedule and the best Schedule
+    """
+    best_schedule = DynamicProgrammingSearch(verbose=False).search(schedule)
+    return schedule.score.penalty - best_schedule.score.penalty, schedule.score.bonus - best_schedule.score.bonus
+
+
+def perform_tabu_search(params, cache=None, engine='tabu', observer=None, starts=MULTI_START_NUMBER, workers=None,
+                        deadline=None, transposition_table=None, neighborhood_workers=None, candidates=None,
+                        seed=None):
+    """
+    For a given params, find the best Schedule.
+    :param params: the Schedule params
+    :param cache: Result Cache used to return already found Schedules
+    :param engine: name of the search algorithm, one of ENGINE_CHOICES
+    :param observer: Search Observer notified about the search progress
+    :param starts: number of initial schedules of the multi-start search
+    :param workers: number of processes of the multi-start search, number of CPUs if None
+    :param deadline: max time of the tabu search in milliseconds
+    :param transposition_table: Transposition Table shared by the tabu searches
+    :param neighborhood_workers: number of processes the neighborhood of the tabu search is split between
+    :param candidates: number of sequences with violated constraints the tabu search finds moves for in each iteration
+    :param seed: seed of the random searches and of the candidate list
+    :return:
+    """
+    print(params)
+    best_schedule = solve_schedule(params, verbose=True, cache=cache, engine=engine, observer=observer, starts=starts,
+                                   workers=workers, deadline=deadline, transposition_table=transposition_table,
+                                   neighborhood_workers=neighborhood_workers, candidates=candidates, seed=seed)
     print(best_schedule)
     print(best_schedule.score)
@@ -0,0 +1,156 @@
+import json
+import time
+
+
+class IterationStats:
+    """
+    Counters and timings of one search iteration.
+    """
+
+    def __init__(self, iteration, neighbors, tabu_rejected, copies, find_neighborhood_time, evaluate_time, tabu_time,
+                 current_score, best_score, elapsed):
+        """
+        Create Iteration Stats.
+        :param iteration: index of the iteration
+        :param neighbors: number of neighbors generated
+        :param tabu_rejected: number of neighbors rejected as tabu
+        :param copies: number of Schedules copied
+        :param find_neighborhood_time: seconds spent generating the neighborhood
+        :param evaluate_time: seconds spent creating and evaluating the chosen neighbor
+        :param tabu_time: seconds spent filtering tabu neighbors and updating the tabu list
+        :param current_score: score of the current Schedule
+        :param best_score: score of the best Schedule
+        :param elapsed: seconds since the search started
+        """
+        self.iteration = iteration
+        self.neighbors = neighbors
+        self.tabu_rejected = tabu_rejected
+        self.copies = copies
+        self.find_neighborhood_time = find_neighborhood_time
+        self.evaluate_time = evaluate_time
+        self.tabu_time = tabu_time
+        self.current_score = current_score
+        self.best_score = best_score
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {
+            'iteration': self.iteration,
+            'neighbors': self.neighbors,
+            'tabu_rejected': self.tabu_rejected,
+            'copies': self.copies,
+            'find_neighborhood_time': self.find_neighborhood_time,
+            'evaluate_time': self.evaluate_time,
+            'tabu_time': self.tabu_time,
+            'current_penalty': self.current_score.penalty if self.current_score is not None else None,
+            'current_total': self.current_score.total if self.current_score is not None else None,
+            'best_penalty': self.best_score.penalty,
+            'best_total': self.best_score.total,
+            'elapsed': self.elapsed,
+        }
+
+
+class SearchObserver:
+    """
+    Search Observer, receives events from the search. Methods do nothing, subclasses override the ones they need.
+    """
+
+    def on_start(self, search, initial_schedule):
+        """
+        Called before the first iteration.
+        :param search: the search
+        :param initial_schedule: the initial schedule
+        :return:
+        """
+
+    def on_iteration(self, search, stats):
+        """
+        Called after each iteration.
+        :param search: the search
+        :param stats: the Iteration Stats
+        :return:
+        """
+
+    def on_end(self, search, best_schedule):
+        """
+        Called when the search is finished.
+        :param search: the search
+        :param best_schedule: the best schedule
+        :return:
+        """
+
+
+class CallbackObserver(SearchObserver):
+    """
+    Observer which calls the function after each iteration.
+    """
+
+    def __init__(self, callback):
+        """
+        Create a new Callback Observer.
+        :param callback: function called with the search and the Iteration Stats
+        """
+        self.callback = callback
+
+    def on_iteration(self, search, stats):
+        self.callback(search, stats)
+
+
+class StatsCollector(SearchObserver):
+    """
+    Observer which sums counters and timings of all iterations, and records the best score over time.
+    """
+
+    def __init__(self):
+        self.iterations = 0
+        self.neighbors = 0
+        self.tabu_rejected = 0
+        self.copies = 0
+        self.find_neighborhood_time = 0
+        self.evaluate_time = 0
+        self.tabu_time = 0
+        # List of (elapsed seconds, best penalty, best total) for each improvement
+        self.best_history = []
+
+    def on_iteration(self, search, stats):
+        self.iterations += 1
+        self.neighbors += stats.neighbors
+        self.tabu_rejected += stats.tabu_rejected
+        self.copies += stats.copies
+        self.find_neighborhood_time += stats.find_neighborhood_time
+        self.evaluate_time += stats.evaluate_time
+        self.tabu_time += stats.tabu_time
+        if not self.best_history or self.best_history[-1][1:] != (stats.best_score.penalty, stats.best_score.total):
+            self.best_history.append((stats.elapsed, stats.best_score.penalty, stats.best_score.total))
+
+
+class TraceWriter(SearchObserver):
+    """
+    Observer which writes all events to the file as JSON lines.
+    """
+
+    def __init__(self, file):
+        """
+        Create a new Trace Writer.
+        :param file: the opened text file
+        """
+        self.file = file
+        self.start_time = None
+
+    def write(self, event, **data):
+        self.file.write(json.dumps(dict(event=event, **data)) + '\n')
+
+    def on_start(self, search, initial_schedule):
+        self.start_time = time.perf_counter()
+        # Own masks of predefined days off are not written
+        self.write('start', search=type(search).__name__, params=initial_schedule.params_key[:6],
+                   penalty=initial_schedule.score.penalty, total=initial_schedule.score.total)
+
+    def on_iteration(self, search, stats):
+        self.write('iteration', **stats.to_dict())
+
+    def on_end(self, search, best_schedule):
+        self.write('end', iterations=search.iterations, neighbors=search.neighbors,
+                   elapsed=time.perf_counter() - self.start_time, penalty=best_schedule.score.penalty,
+                   total=best_schedule.score.total)
+        self.file.flush()
@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import solve_chunk
+from constants import SERVICE_HOST, SERVICE_PORT, SERVICE_BATCH_SIZE, SERVICE_BATCH_DELAY, SERVICE_MAX_QUEUED, \
+    SERVICE_MAX_CONNECTION_REQUESTS
+from model import ENGINE_CHOICES
+from stream import read_params
+
+
+class ScheduleService:
+    """
+    Asyncio front-end of the pool of processes. Concurrent requests are collected into batches, and each batch is
+    solved by one process, so a process is not started for each request.
+    """
+
+    def __init__(self, workers=None, batch_size=SERVICE_BATCH_SIZE, batch_delay=SERVICE_BATCH_DELAY, max_pending=None,
+                 max_queued=SERVICE_MAX_QUEUED, max_connection_requests=SERVICE_MAX_CONNECTION_REQUESTS,
+                 **search_params):
+        """
+        Create a new Schedule Service.
+        :param workers: number of processes, number of CPUs if None
+        :param batch_size: max number of requests in a batch
+        :param batch_delay: seconds to wait for more requests before the batch is sent to the pool
+        :param max_pending: max number of batches sent to the pool at the same time, twice the number of processes if
+                            None
+        :param max_queued: max number of requests waiting for a batch, 'solve' waits when the queue is full
+        :param max_connection_requests: max number of requests of one connection solved at the same time, next lines
+                                        of the connection are not read until one of them is answered
+        :param search_params: keyword arguments for 'solve_schedule'
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending or 2 * self.workers
+        self.max_queued = max_queued
+        self.max_connection_requests = max_connection_requests
+        self.search_params = search_params
+        self.executor = None
+        self.requests = None
+        self.batcher = None
+        self.pending = None
+        # Tasks of the batches sent to the pool, the event loop keeps only weak references to tasks
+        self.batches = set()
+        self.count = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def start(self):
+        """
+        Start the pool of processes, and the task that sends batches of requests to it.
+        :return:
+        """
+        # Forked processes would inherit the sockets of the open connections and keep them open after they are closed
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self.requests = asyncio.Queue(self.max_queued)
+        self.pending = asyncio.Semaphore(self.max_pending)
+        self.batcher = asyncio.get_running_loop().create_task(self.send_batches())
+
+    async def close(self):
+        """
+        Stop sending batches, wait for the batches sent to the pool, and shut down the pool of processes.
+        :return:
+        """
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+        await asyncio.gather(*self.batches, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+    async def solve(self, params):
+        """
+        Solve the params.
+        :param params: the Schedule params
+        :return: the Batch Result
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.requests.put((self.count, params, future))
+        self.count += 1
+        return await future
+
+    async def send_batches(self):
+        """
+        Collect requests into batches, and send them to the pool. At most 'max_pending' batches are solved at the same
+        time, other requests wait in the queue.
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.requests.get()]
+            batch_end = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                timeout = batch_end - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.requests.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.pending.acquire()
+            task = loop.create_task(self.solve_batch(batch))
+            self.batches.add(task)
+            task.add_done_callback(self.batches.discard)
+
+    async def solve_batch(self, batch):
+        """
+        Solve the batch on the pool, and set the results of the requests.
+        :param batch: list of (index, params, future) tuples
+        :return:
+        """
+        try:
+            chunk = [(index, params) for index, params, _ in batch]
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, solve_chunk, chunk,
+                                                                       self.search_params)
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.pending.release()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve the connection. Each line is a request with the Schedule params as JSON, and each response is the result
+        as JSON line. Responses are written in the completion order; 'index' is the position of the request in the
+        connection. At most 'max_connection_requests' requests of the connection are solved at the same time.
+        :param reader: the stream reader
+        :param writer: the stream writer
+        :return:
+        """
+        in_progress = asyncio.Semaphore(self.max_connection_requests)
+
+        async def respond(index, params):
+            try:
+                result = (await self.solve(params)).to_dict()
+                result['index'] = index
+                writer.write((json.dumps(result) + '\n').encode())
+                await writer.drain()
+            finally:
+                in_progress.release()
+
+        tasks = set()
+        index = 0
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # Lines which are not valid UTF-8 are reported as invalid params, like lines which are not valid JSON
+                for params in read_params([line.decode(errors='replace')]):
+                    await in_progress.acquire()
+                    task = asyncio.get_running_loop().create_task(respond(index, params))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    index += 1
+        finally:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+
+async def serve(host=SERVICE_HOST, port=SERVICE_PORT, **service_params):
+    """
+    Run the service on the local TCP port until it's cancelled.
+    :param host: the host
+    :param port: the port
+    :param service_params: keyword arguments for 'ScheduleService'
+    :return:
+    """
+    async with ScheduleService(**service_params) as service:
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        async with server:
+            print(f'Serving on {host}:{port}')
+            await server.serve_forever()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve the schedule search on the local TCP port. Requests and '
+                                                 'responses are JSON lines.')
+    parser.add_argument('--host', default=SERVICE_HOST, help='the host')
+    parser.add_argument('--port', type=int, default=SERVICE_PORT, help='the port')
+    parser.add_argument('--engine', choices=ENGINE_CHOICES, default='tabu', help='search algorithm')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, number of CPUs by default')
+    parser.add_argument('--batch-size', type=int, default=SERVICE_BATCH_SIZE, help='max number of requests in a batch')
+    parser.add_argument('--batch-delay', type=float, default=SERVICE_BATCH_DELAY,
+                        help='seconds to wait for more requests before the batch is solved')
+    parser.add_argument('--deadline', type=float, default=None, help='max time of each tabu search in milliseconds')
+    parser.add_argument('--candidates', type=int, default=None,
+                        help='number of sequences with violated constraints the tabu search finds moves for in each '
+                             'iteration, all days are checked by default')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the annealing and lahc engines, and of the sampling of the candidate sequences')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, batch_size=args.batch_size,
+                          batch_delay=args.batch_delay, engine=args.engine, deadline=args.deadline,
+                          candidates=args.candidates, seed=args.seed))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,155 @@
+import mmap
+import os
+import struct
+
+from model import Schedule
+
+# Each record is the length of the binary Schedule followed by the Schedule, see 'Schedule.to_bytes'
+RECORD_LENGTH = struct.Struct('<I')
+
+
+def store_key(params_key):
+    """
+    Get the key of the params in the Roster Store. Predefined days off are stored as a set, so they are sorted. Own
+    masks of predefined days off are part of the key.
+    :param params_key: tuple of Schedule params, see 'Schedule.params_key'
+    :return:
+    """
+    return tuple(params_key[:5]) + (tuple(sorted(set(params_key[5]))),) + tuple(params_key[6:])
+
+
+class RosterStore:
+    """
+    Append-only file of binary Schedules. Schedules are read through the memory map of the file, so reading a record
+    doesn't copy it. Records are indexed by the Schedule params when the store is opened.
+    """
+
+    def __init__(self, path):
+        """
+        Open the Roster Store, the file is created if it doesn't exist.
+        :param path: path of the file
+        """
+        self.path = path
+        self.file = open(path, 'a+b')
+        self.map = None
+        # Offset of each record, and indices of the records for each params key
+        self.offsets = []
+        self.index = {}
+        self._size = 0
+        self._remap()
+        self._read_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _remap(self):
+        """
+        Map the file again, so that the appended records can be read.
+        :return:
+        """
+        self.file.flush()
+        size = os.fstat(self.file.fileno()).st_size
+        self._release_map()
+        self.map = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+
+    def _release_map(self):
+        """
+        Close the memory map. If views returned by 'get_bytes' still exist, the map is only dropped; the views keep it
+        open, and it's closed when the last of them is released.
+        :return:
+        """
+        if self.map is None:
+            return
+        try:
+            self.map.close()
+        except BufferError:
+            pass
+        self.map = None
+
+    def _read_index(self):
+        """
+        Index all records of the file. Only headers of the Schedules are read.
+        :return:
+        """
+        size = len(self.map) if self.map is not None else 0
+        offset = 0
+        while offset + RECORD_LENGTH.size <= size:
+            length, = RECORD_LENGTH.unpack_from(self.map, offset)
+            # A record that was not completely written is ignored, and overwritten by the next append
+            if offset + RECORD_LENGTH.size + length > size:
+                break
+            self._add_to_index(offset + RECORD_LENGTH.size)
+            offset += RECORD_LENGTH.size + length
+        self._size = offset
+        if offset < size:
+            self.file.truncate(offset)
+            self._remap()
+
+    def _add_to_index(self, offset):
+        schedule_params, _, masks = Schedule.read_header(self.map, offset)
+        self.index.setdefault(store_key(schedule_params + list(masks or ())), []).append(len(self.offsets))
+        self.offsets.append(offset)
+
+    def append(self, schedule):
+        """
+        Append the Schedule to the store.
+        :param schedule: the schedule
+        :return: index of the record
+        """
+        self.extend([schedule])
+        return len(self.offsets) - 1
+
+    def extend(self, schedules):
+        """
+        Append the Schedules to the store. The file is mapped again only once, after all Schedules are written.
+        :param schedules: iterable of Schedules
+        :return:
+        """
+        offsets = []
+        for schedule in schedules:
+            data = schedule.to_bytes()
+            self.file.write(RECORD_LENGTH.pack(len(data)))
+            self.file.write(data)
+            offsets.append(self._size + RECORD_LENGTH.size)
+            self._size += RECORD_LENGTH.size + len(data)
+        if offsets:
+            self._remap()
+            for offset in offsets:
+                self._add_to_index(offset)
+
+    def get_bytes(self, record_index):
+        """
+        Get the binary Schedule without copying it. The view stays valid after more records are appended, or after the
+        store is closed.
+        :param record_index: index of the record
+        :return: memoryview of the binary Schedule
+        """
+        offset = self.offsets[record_index]
+        length, = RECORD_LENGTH.unpack_from(self.map, offset - RECORD_LENGTH.size)
+        return memoryview(self.map)[offset:offset + length]
+
+    def get(self, record_index):
+        """
+        Get the Schedule.
+        :param record_index: index of the record
+        :return:
+        """
+        return Schedule.from_bytes(self.map, self.offsets[record_index])
+
+    def find(self, params_key):
+        """
+        Find the records of the Schedules with the params.
+        :param params_key: tuple of Schedule params, see 'Schedule.params_key'
+        :return: list of record indices
+        """
+        return self.index.get(store_key(params_key), [])
+
+    def close(self):
+        self._release_map()
+        self.file.close()
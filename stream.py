@@ -0,0 +1,77 @@
+import argparse
+import json
+import sys
+
+from batch import solve_batch
+from constants import BATCH_CHUNK_SIZE, MULTI_START_NUMBER
+from model import ENGINE_CHOICES
+
+
+def read_params(lines):
+    """
+    Read the Schedule params from JSON lines. Empty lines are skipped. Lines which are not valid JSON are passed as
+    strings, so they are reported as invalid params in the output instead of stopping the stream.
+    :param lines: iterable of lines, e.g. an opened file
+    :return: generator of params
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield line
+
+
+def write_results(results, output):
+    """
+    Write the Batch Results as JSON lines. Each line is flushed, so results can be read as soon as they are found.
+    :param results: iterable of Batch Results
+    :param output: the opened text file
+    :return: number of written results
+    """
+    count = 0
+    for result in results:
+        output.write(json.dumps(result.to_dict()) + '\n')
+        output.flush()
+        count += 1
+    return count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Solve the schedule params read as JSON lines, and write the results '
+                                                 'as JSON lines.')
+    parser.add_argument('input', nargs='?', default='-', help='the input file, stdin if not set or -')
+    parser.add_argument('--output', default='-', help='the output file, stdout if not set or -')
+    parser.add_argument('--engine', choices=ENGINE_CHOICES, default='tabu', help='search algorithm')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, number of CPUs by default')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE, help='params sent to a process at once')
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help='max number of chunks solved at the same time, twice the number of processes by default')
+    parser.add_argument('--unordered', action='store_true', help='write results in the completion order')
+    parser.add_argument('--starts', type=int, default=MULTI_START_NUMBER,
+                        help='number of initial schedules of the multistart engine')
+    parser.add_argument('--deadline', type=float, default=None, help='max time of each tabu search in milliseconds')
+    parser.add_argument('--candidates', type=int, default=None,
+                        help='number of sequences with violated constraints the tabu search finds moves for in each '
+                             'iteration, all days are checked by default')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the annealing and lahc engines, and of the sampling of the candidate sequences')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    input_file = sys.stdin if args.input == '-' else open(args.input)
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        write_results(solve_batch(read_params(input_file), workers=args.workers, chunk_size=args.chunk_size,
+                                  ordered=not args.unordered, max_pending=args.max_pending, engine=args.engine,
+                                  starts=args.starts, deadline=args.deadline, candidates=args.candidates,
+                                  seed=args.seed), output_file)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
@@ -0,0 +1,90 @@
+import itertools
+
+from batch import solve_batch
+from cache import ResultCache, cache_key
+from constants import SCHEDULE_TEST_PARAMS
+from model import solve_schedule, schedule_cache_key
+
+
+def test_batch_matches_serial():
+    params_list = SCHEDULE_TEST_PARAMS + ['invalid params']
+    results = list(solve_batch(params_list, workers=2, chunk_size=3, max_pending=2))
+    assert [result.index for result in results] == list(range(len(params_list)))
+    for result, params in zip(results, params_list):
+        try:
+            expected = solve_schedule(params)
+        except AssertionError as e:
+            assert result.error == str(e)
+            continue
+        assert result.schedule.day_types == expected.day_types
+
+
+def test_ordered_batch_holds_bounded_results():
+    read = []
+
+    def params_list():
+        # The first params are slow, so the next chunks are completed before it
+        yield dict(SCHEDULE_TEST_PARAMS[3], num_days=365)
+        for i in range(40):
+            read.append(i)
+            yield SCHEDULE_TEST_PARAMS[4]
+
+    results = solve_batch(params_list(), workers=2, chunk_size=1, max_pending=3)
+    assert next(results).index == 0
+    assert len(read) <= 3
+    assert len(list(results)) == 40
+
+
+def test_unordered_batch_returns_all_results():
+    results = list(solve_batch(SCHEDULE_TEST_PARAMS, workers=2, ordered=False))
+    assert sorted(result.index for result in results) == list(range(len(SCHEDULE_TEST_PARAMS)))
+
+
+def test_batch_solves_cached_params_once():
+    cache = ResultCache()
+    params_list = [SCHEDULE_TEST_PARAMS[4]] * 3 + [SCHEDULE_TEST_PARAMS[5]]
+    results = list(solve_batch(params_list, workers=1, chunk_size=1, max_pending=1, cache=cache))
+    assert [result.index for result in results] == list(range(len(params_list)))
+    assert len(cache.memory) == 2
+    # The duplicates are taken from the cache of this process
+    assert [result.time == 0 for result in results] == [False, True, True, False]
+    assert results[1].schedule.day_types == results[0].schedule.day_types
+
+
+def test_cache_key_is_normalized():
+    params = dict(SCHEDULE_TEST_PARAMS[0])
+    assert cache_key(params, engine='tabu') == cache_key(dict(params, days_off=params['days_off'][::-1]), engine='tabu')
+    assert cache_key(params, engine='tabu') != cache_key(params, engine='dp')
+    # The number of starts changes only the multi-start search
+    assert schedule_cache_key(params, starts=2) == schedule_cache_key(params, starts=3)
+    assert schedule_cache_key(params, engine='multistart', starts=2) != \
+        schedule_cache_key(params, engine='multistart', starts=3)
+    # The seed changes only the random searches, and the default limits depend on the engine
+    assert schedule_cache_key(params, seed=1) == schedule_cache_key(params, seed=2)
+    assert schedule_cache_key(params, engine='lahc', seed=1) != schedule_cache_key(params, engine='lahc', seed=2)
+    assert schedule_cache_key(params, engine='lahc') != schedule_cache_key(params, engine='lahc', max_iterations=100)
+    # The candidate list and its seed change the tabu search
+    assert schedule_cache_key(params, candidates=3) != schedule_cache_key(params)
+    assert schedule_cache_key(params, candidates=3, seed=1) != schedule_cache_key(params, candidates=3, seed=2)
+    assert schedule_cache_key(params, engine='dp', candidates=3) == schedule_cache_key(params, engine='dp')
+
+
+def test_solve_schedule_with_candidate_list():
+    params = SCHEDULE_TEST_PARAMS[4]
+    cache = ResultCache()
+    schedule = solve_schedule(params, cache=cache, candidates=3, seed=1)
+    assert solve_schedule(params, cache=cache, candidates=3, seed=1).day_types == schedule.day_types
+    assert len(cache.memory) == 1
+    solve_schedule(params, cache=cache)
+    assert len(cache.memory) == 2
+
+
+def test_result_cache(tmp_path):
+    params = SCHEDULE_TEST_PARAMS[4]
+    cache = ResultCache(directory=str(tmp_path))
+    schedule = solve_schedule(params, cache=cache)
+    # The Schedule is found on disk by a new cache
+    cached = solve_schedule(params, cache=ResultCache(directory=str(tmp_path)))
+    assert cached.day_types == schedule.day_types
+    assert cached is not schedule
+    assert len(list(itertools.islice(tmp_path.iterdir(), 2))) == 1
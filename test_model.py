@@ -0,0 +1,254 @@
+import random
+
+import pytest
+
+from constants import SCHEDULE_TEST_PARAMS
+from model import Schedule, DayType, DynamicProgrammingSearch, SCHEDULE_MAGIC, SCHEDULE_VERSION, check_params, \
+    check_feasibility, get_schedule_params, resolve_schedule, solve_rolling_horizon
+
+
+def random_params(rng, max_days=28):
+    """
+    Get random params which pass 'check_params'.
+    :param rng: the random generator
+    :param max_days: max number of days
+    :return:
+    """
+    while True:
+        max_working = rng.randint(1, 6)
+        max_off = rng.randint(1, 3)
+        params = {
+            'num_days': rng.randint(7, max_days),
+            'max_working': max_working,
+            'min_working': rng.randint(0, max_working),
+            'max_off': max_off,
+            'min_off': rng.randint(0, max_off),
+            'days_off': sorted(rng.sample(range(7), rng.randint(0, 2))),
+        }
+        try:
+            check_params(params)
+        except AssertionError:
+            continue
+        return params
+
+
+def feasible_params(rng, number, max_days=28, num_days=None):
+    """
+    Get random params which have a Schedule without penalty.
+    :param rng: the random generator
+    :param number: number of params
+    :param max_days: max number of days
+    :param num_days: number of days of all params, random if None
+    :return:
+    """
+    params_list = []
+    while len(params_list) < number:
+        params = random_params(rng, max_days)
+        if num_days is not None:
+            params['num_days'] = num_days
+        try:
+            check_feasibility(params)
+        except AssertionError:
+            continue
+        params_list.append(params)
+    return params_list
+
+
+def randomized_schedule(params, rng):
+    """
+    Create the Schedule with random types of all days that can be changed.
+    """
+    schedule = Schedule(get_schedule_params(params))
+    for i in range(schedule.num_days):
+        if not schedule.fixed_days_off[i]:
+            schedule.day_types[i] = rng.choice((DayType.WORKING_DAY, DayType.DAY_OFF))
+    schedule.invalidate()
+    return schedule
+
+
+def evaluated(schedule):
+    """
+    Get penalty and bonus of the Schedule evaluated from scratch.
+    """
+    schedule = schedule.copy()
+    schedule.invalidate()
+    return schedule.score.penalty, schedule.score.bonus
+
+
+@pytest.mark.parametrize('params', SCHEDULE_TEST_PARAMS)
+def test_incremental_scoring(params):
+    rng = random.Random(0)
+    for _ in range(5):
+        schedule = randomized_schedule(params, rng)
+        for i in range(schedule.num_days):
+            for day_type in (DayType.WORKING_DAY, DayType.DAY_OFF):
+                expected = schedule.copy()
+                expected.day_types[i] = day_type
+                score = schedule.score_after_change(i, day_type)
+                assert (score.penalty, score.bonus) == evaluated(expected), \
+                    f"Invalid score for day {i} changed to {day_type} in schedule {schedule}"
+
+
+@pytest.mark.parametrize('params', SCHEDULE_TEST_PARAMS)
+def test_moves_match_applied_schedules(params):
+    schedule = Schedule(get_schedule_params(params))
+    for move in schedule.find_moves():
+        neighbor = schedule.apply_move(move)
+        assert (move.score.penalty, move.score.bonus) == evaluated(neighbor)
+        assert move.fingerprint == neighbor.fingerprint
+
+
+def test_fingerprint_identifies_schedule():
+    params = SCHEDULE_TEST_PARAMS[4]
+    schedule = Schedule(get_schedule_params(params))
+    other = Schedule(get_schedule_params(params))
+    assert schedule.fingerprint == other.fingerprint
+    other.change_day_type(1, DayType.DAY_OFF)
+    assert schedule.fingerprint != other.fingerprint
+    assert hash(schedule) == hash(Schedule(get_schedule_params(params)))
+
+
+def test_blocks_are_rebuilt_after_change():
+    schedule = Schedule(get_schedule_params(SCHEDULE_TEST_PARAMS[4]))
+    blocks_number = len(schedule.blocks)
+    schedule.change_day_types([(1, DayType.DAY_OFF)])
+    assert len(schedule.blocks) == blocks_number + 1
+    assert (schedule.score.penalty, schedule.score.bonus) == evaluated(schedule)
+
+
+def test_change_in_place_does_not_change_original():
+    schedule = Schedule(get_schedule_params(SCHEDULE_TEST_PARAMS[4]))
+    run_length = schedule.cons_days_number(1)
+    copy = schedule.copy()
+    copy.change_day_type_in_place(1, DayType.DAY_OFF, copy.score_after_change(1, DayType.DAY_OFF))
+    assert schedule.cons_days_number(1) == run_length
+    assert copy.cons_days_number(1) == 1
+    rebuilt = copy.copy()
+    rebuilt.invalidate()
+    assert copy.short_working_blocks == rebuilt.short_working_blocks
+    assert (copy.score.penalty, copy.score.bonus) == evaluated(copy)
+
+
+def test_fixed_day_cannot_be_changed():
+    schedule = Schedule(get_schedule_params(SCHEDULE_TEST_PARAMS[0]))
+    fixed_day = schedule.fixed_days_off.index(1)
+    with pytest.raises(TypeError):
+        schedule.change_day_type(fixed_day, DayType.WORKING_DAY)
+
+
+@pytest.mark.parametrize('params', SCHEDULE_TEST_PARAMS)
+def test_binary_round_trip(params):
+    schedule = randomized_schedule(params, random.Random(1))
+    data = schedule.to_bytes()
+    restored = Schedule.from_bytes(data)
+    assert restored.day_types == schedule.day_types
+    assert restored.fixed_days_off == schedule.fixed_days_off
+    assert restored.params_key == schedule.params_key
+    assert (restored.score.penalty, restored.score.bonus) == (schedule.score.penalty, schedule.score.bonus)
+    assert Schedule.read_header(b'\0' + data, 1)[0] == [*schedule.params_key[:5], sorted(schedule.days_off)]
+
+
+def test_binary_version_is_checked():
+    data = bytearray(Schedule(get_schedule_params(SCHEDULE_TEST_PARAMS[0])).to_bytes())
+    data[len(SCHEDULE_MAGIC)] = SCHEDULE_VERSION + 1
+    with pytest.raises(ValueError):
+        Schedule.from_bytes(data)
+
+
+@pytest.mark.parametrize('params', [
+    'not params',
+    {'num_days': 7},
+    {'num_days': -1, 'max_working': 5, 'min_working': 2, 'max_off': 3, 'min_off': 1, 'days_off': []},
+    {'num_days': 7, 'max_working': 5, 'min_working': 2, 'max_off': 3, 'min_off': 1, 'days_off': [8]},
+    {'num_days': 7, 'max_working': 5, 'min_working': 2, 'max_off': 3, 'min_off': 1, 'days_off': [True]},
+    {'num_days': True, 'max_working': 5, 'min_working': 2, 'max_off': 3, 'min_off': 1, 'days_off': []},
+])
+def test_invalid_params(params):
+    with pytest.raises(AssertionError):
+        check_params(params)
+
+
+def test_sunday_is_fixed_and_penalized():
+    params = {'num_days': 28, 'max_working': 5, 'min_working': 2, 'max_off': 3, 'min_off': 1, 'days_off': [6, 0]}
+    check_params(params)
+    schedule = Schedule(get_schedule_params(params))
+    assert schedule.params_key == Schedule(get_schedule_params(dict(params, days_off=[6, 7]))).params_key
+    sundays = [i for i in range(schedule.num_days) if i % 7 == 6]
+    assert [i for i in range(schedule.num_days) if schedule.fixed_days_off[i] and i % 7 == 6] == sundays
+    assert schedule.eval_days_off() == 0
+
+
+def test_feasibility_matches_exact_search():
+    rng = random.Random(2)
+    for _ in range(200):
+        params = random_params(rng)
+        try:
+            check_feasibility(params)
+            feasible = True
+        except AssertionError:
+            feasible = False
+        best_schedule = DynamicProgrammingSearch(verbose=False).search(Schedule(get_schedule_params(params)))
+        assert feasible == (best_schedule.score.penalty == 0), params
+
+
+def test_resolve_matches_exact_search():
+    rng = random.Random(3)
+    search = DynamicProgrammingSearch(verbose=False)
+    for params in feasible_params(rng, 20, max_days=84):
+        schedule = search.search(Schedule(get_schedule_params(params)))
+        mutable_days = [i for i in range(schedule.num_days) if not schedule.fixed_days_off[i]]
+        add_days_off = rng.sample(mutable_days, 2)
+
+        # The whole Schedule is solved again, a smaller window could keep days far from the changes that are not optimal
+        resolved = resolve_schedule(schedule, add_days_off=add_days_off, extend_days=7, window=schedule.num_days)
+        expected = schedule.copy()
+        expected.num_days += 7
+        expected.day_types += bytes([DayType.WORKING_DAY]) * 7
+        expected.set_days_off_masks(resolved.fixed_days_off, resolved.invalid_days_off)
+        expected.invalidate()
+        expected = search.search(expected)
+
+        assert all(resolved.day_types[i] == DayType.DAY_OFF for i in add_days_off)
+        assert (resolved.score.penalty, resolved.score.bonus) == evaluated(resolved)
+        assert (resolved.score.penalty, resolved.score.total) == (expected.score.penalty, expected.score.total)
+
+
+def test_resolve_changes_days_off_of_dates():
+    search = DynamicProgrammingSearch(verbose=False)
+    params = {'num_days': 28, 'max_working': 5, 'min_working': 2, 'max_off': 3, 'min_off': 1, 'days_off': [5, 6]}
+    schedule = search.search(Schedule(get_schedule_params(params)))
+    removed_day = schedule.fixed_days_off.index(1)
+    added_day = schedule.day_types.index(DayType.WORKING_DAY, removed_day + 1)
+
+    resolved = resolve_schedule(schedule, add_days_off=[added_day], remove_days_off=[removed_day],
+                                window=schedule.num_days)
+    assert (resolved.fixed_days_off[removed_day], resolved.invalid_days_off[removed_day]) == (0, 0)
+    assert (resolved.fixed_days_off[added_day], resolved.invalid_days_off[added_day]) == (1, 1)
+    assert resolved.day_types[added_day] == DayType.DAY_OFF
+    # The removed day off is a working day without penalty
+    assert resolved.day_types[removed_day] == DayType.WORKING_DAY
+    assert (resolved.score.penalty, resolved.score.bonus) == evaluated(resolved)
+    assert resolved.score.penalty == 0
+
+    # The masks are part of the params, and of the binary Schedule
+    assert resolved.params_key != schedule.params_key
+    same_days = Schedule(get_schedule_params(params), days=list(resolved.day_types))
+    assert resolved.fingerprint != same_days.fingerprint
+    assert resolved != same_days and len({resolved, same_days}) == 2
+    restored = Schedule.from_bytes(resolved.to_bytes())
+    assert restored.fingerprint == resolved.fingerprint
+    assert (restored.fixed_days_off, restored.invalid_days_off) == (resolved.fixed_days_off, resolved.invalid_days_off)
+
+
+def test_rolling_horizon_matches_exact_search():
+    rng = random.Random(4)
+    search = DynamicProgrammingSearch(verbose=False)
+    for params in feasible_params(rng, 10, num_days=rng.randint(150, 250)):
+        day_types = list(solve_rolling_horizon(params, window=56, overlap=21))
+        expected = search.search(Schedule(get_schedule_params(params)))
+        schedule = expected.copy()
+        schedule.day_types = bytearray(day_types)
+        schedule.invalidate()
+        assert len(day_types) == params['num_days']
+        assert not any(schedule.fixed_days_off[i] and day_types[i] for i in range(len(day_types)))
+        assert schedule.score.penalty == expected.score.penalty == 0
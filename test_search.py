@@ -0,0 +1,196 @@
+import itertools
+import random
+import time
+
+import pytest
+
+from cache import TranspositionTable
+from constants import SCHEDULE_TEST_PARAMS
+from model import Schedule, DynamicProgrammingSearch, PeriodicSearch, TabuSearch, AdaptiveTabuSearch, \
+    MultiStartSearch, SEARCH_ENGINES, create_search, get_schedule_params, check_feasibility, select_engine, \
+    optimality_gap, solve_schedule
+from observers import StatsCollector
+from test_model import random_params, feasible_params, evaluated
+
+
+def feasible_test_params():
+    params_list = []
+    for params in SCHEDULE_TEST_PARAMS:
+        try:
+            check_feasibility(params)
+        except AssertionError:
+            continue
+        params_list.append(params)
+    return params_list
+
+
+def search_result(search, params):
+    best_schedule = search.search(Schedule(get_schedule_params(params)))
+    return bytes(best_schedule.day_types), best_schedule.score.penalty, best_schedule.score.total
+
+
+def test_exact_search_is_optimal():
+    rng = random.Random(0)
+    for _ in range(40):
+        params = random_params(rng, max_days=12)
+        initial_schedule = Schedule(get_schedule_params(params))
+        best_schedule = DynamicProgrammingSearch(verbose=False).search(initial_schedule)
+
+        mutable_days = [i for i in range(initial_schedule.num_days) if not initial_schedule.fixed_days_off[i]]
+        best_score = None
+        for day_types in itertools.product((0, 1), repeat=len(mutable_days)):
+            schedule = initial_schedule.copy()
+            for day_index, day_type in zip(mutable_days, day_types):
+                schedule.day_types[day_index] = day_type
+            schedule.invalidate()
+            score = (schedule.score.penalty, schedule.score.total)
+            best_score = score if best_score is None else min(best_score, score)
+
+        assert (best_schedule.score.penalty, best_schedule.score.bonus) == evaluated(best_schedule)
+        assert (best_schedule.score.penalty, best_schedule.score.total) == best_score, params
+
+
+@pytest.mark.parametrize('params', feasible_test_params())
+@pytest.mark.parametrize('engine', ['tabu', 'dp', 'periodic', 'adaptive', 'annealing', 'lahc'])
+def test_engines_find_schedule_without_penalty(engine, params):
+    search = create_search(engine, seed=0)
+    best_schedule = search.search(Schedule(get_schedule_params(params)))
+    assert (best_schedule.score.penalty, best_schedule.score.bonus) == evaluated(best_schedule)
+    assert best_schedule.score.penalty == 0
+    assert not any(best_schedule.fixed_days_off[i] and best_schedule.day_types[i]
+                   for i in range(best_schedule.num_days))
+    assert optimality_gap(best_schedule)[0] == 0
+
+
+@pytest.mark.parametrize('engine', ['annealing', 'lahc'])
+def test_random_searches_are_reproducible(engine):
+    params = dict(SCHEDULE_TEST_PARAMS[3], num_days=56)
+    assert search_result(create_search(engine, seed=3), params) == search_result(create_search(engine, seed=3), params)
+
+
+@pytest.mark.parametrize('engine', ['annealing', 'lahc'])
+def test_random_searches_use_iteration_limits(engine):
+    params = dict(SCHEDULE_TEST_PARAMS[3], num_days=365)
+    search = create_search(engine, max_iterations=50, seed=0)
+    search.search(Schedule(get_schedule_params(params)))
+    assert search.iterations <= 51
+    # The seed is passed to the search
+    best_schedule = solve_schedule(params, engine=engine, seed=4)
+    assert search_result(create_search(engine, seed=4), params)[0] == bytes(best_schedule.day_types)
+
+
+def test_auto_engine_is_chosen_by_params():
+    assert 'auto' not in SEARCH_ENGINES
+    with pytest.raises(ValueError):
+        create_search('auto')
+    params = SCHEDULE_TEST_PARAMS[0]
+    expected = solve_schedule(params, engine=select_engine(params))
+    assert solve_schedule(params, engine='auto').day_types == expected.day_types
+
+
+def test_periodic_schedule_repeats():
+    params = dict(SCHEDULE_TEST_PARAMS[5], num_days=365)
+    search = PeriodicSearch(TabuSearch(10, 10, 10, verbose=False), verbose=False)
+    best_schedule = search.search(Schedule(get_schedule_params(params)))
+    assert search.cycle_weeks is not None
+    cycle_days = 7 * search.cycle_weeks
+    assert best_schedule.day_types[cycle_days:] == best_schedule.day_types[:-cycle_days]
+    assert best_schedule.score.penalty == 0
+
+
+@pytest.mark.parametrize('params', feasible_test_params()[:8])
+def test_parallel_neighborhood_matches_serial(params):
+    serial, parallel = StatsCollector(), StatsCollector()
+    expected = search_result(create_search('tabu', observer=serial), params)
+    assert search_result(create_search('tabu', observer=parallel, neighborhood_workers=2), params) == expected
+    assert (parallel.iterations, parallel.neighbors, parallel.tabu_rejected) == \
+        (serial.iterations, serial.neighbors, serial.tabu_rejected)
+
+
+@pytest.mark.parametrize('engine, candidates', [('tabu', 3), ('adaptive', None), ('multistart', None)])
+def test_unsupported_neighborhood_workers_raise(engine, candidates):
+    with pytest.raises(ValueError):
+        create_search(engine, neighborhood_workers=2, candidates=candidates)
+
+
+def test_candidate_list_of_all_sequences_matches_full_scan():
+    params_list = feasible_params(random.Random(2), 30, max_days=56) + [
+        {'num_days': 21, 'max_working': 5, 'min_working': 2, 'max_off': 1, 'min_off': 1, 'days_off': []},
+        {'num_days': 14, 'max_working': 4, 'min_working': 2, 'max_off': 1, 'min_off': 1, 'days_off': [3]},
+    ]
+    for params in params_list:
+        assert search_result(create_search('tabu', candidates=10 ** 9), params) == \
+            search_result(create_search('tabu'), params), params
+
+
+class CurrentScheduleTabuSearch(TabuSearch):
+    """
+    Tabu Search that keeps the current schedule of the last iteration.
+    """
+
+    def find_neighborhood(self, schedule, candidate_list):
+        self.current_schedule = schedule
+        return super().find_neighborhood(schedule, candidate_list)
+
+
+@pytest.mark.parametrize('candidates', [1, 2, 4])
+def test_candidate_list_stops_only_without_allowed_moves(candidates):
+    params_list = feasible_params(random.Random(3), 20, max_days=56) + [
+        {'num_days': 51, 'max_working': 4, 'min_working': 0, 'max_off': 3, 'min_off': 3, 'days_off': [1]},
+    ]
+    for params in params_list:
+        search = CurrentScheduleTabuSearch(10, 5000, 10, verbose=False, candidates=candidates)
+        best_schedule = search.search(Schedule(get_schedule_params(params)))
+        if best_schedule.score.penalty > 0 and search.iterations < search.max_iterations:
+            schedule = search.current_schedule
+            assert not search.allowed_moves(schedule.find_moves(), best_schedule, search.iterations), params
+
+
+def test_periodic_search_reports_fallback_deadline():
+    search = PeriodicSearch(TabuSearch(10, 10, 10, verbose=False, deadline=0), max_weeks=0, verbose=False)
+    search.search(Schedule(get_schedule_params(SCHEDULE_TEST_PARAMS[5])))
+    assert search.cycle_weeks is None
+    assert search.timed_out
+
+
+def test_multi_start_deadline_bounds_all_starts():
+    params = dict(SCHEDULE_TEST_PARAMS[3], num_days=730)
+    search = MultiStartSearch(1000, 5000, 10, starts=6, workers=1, verbose=False, deadline=500)
+    start = time.perf_counter()
+    best_schedule = search.search(Schedule(get_schedule_params(params)))
+    # Process start-up is not covered by the deadline
+    assert time.perf_counter() - start < 2
+    assert search.timed_out
+    assert best_schedule is not None
+
+
+def test_multi_start_is_not_worse_than_single_start():
+    for params in feasible_params(random.Random(1), 4, max_days=56):
+        single = search_result(create_search('tabu'), params)
+        search = MultiStartSearch(100, 100, 10, starts=3, workers=2, verbose=False)
+        multi = search_result(search, params)
+        assert multi[1:] <= single[1:]
+        # The first start is the default initial schedule, so it gives the single start result
+        if search.best_start == 0:
+            assert multi == single
+
+
+def test_shared_transposition_table_keeps_results():
+    table = TranspositionTable()
+    for params in feasible_test_params()[:6]:
+        for engine in ('tabu', 'adaptive', 'tabu'):
+            expected = search_result(create_search(engine), params)
+            assert search_result(create_search(engine, transposition_table=table), params) == expected
+    assert table.hits > 0
+
+    schedule = Schedule(get_schedule_params(SCHEDULE_TEST_PARAMS[4]))
+    schedule.change_day_type(1, 0)
+    adaptive_moves = schedule.find_moves_cached(table, AdaptiveTabuSearch.find_moves)
+    assert len(schedule.find_moves_cached(table)) == len(schedule.find_moves()) < len(adaptive_moves)
+
+
+def test_select_engine():
+    params = dict(SCHEDULE_TEST_PARAMS[0])
+    assert select_engine(params) == 'tabu'
+    assert select_engine(dict(params, num_days=730)) == 'lahc'
+    assert select_engine(dict(params, num_days=730, max_off=2, min_off=2)) == 'annealing'
@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from constants import SCHEDULE_TEST_PARAMS
+from service import ScheduleService
+
+
+def test_service_answers_all_requests_of_connection():
+    params_list = SCHEDULE_TEST_PARAMS[:6]
+
+    async def run():
+        async with ScheduleService(workers=1, batch_size=2, max_queued=2, max_connection_requests=2) as service:
+            server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                for params in params_list:
+                    writer.write((json.dumps(params) + '\n').encode())
+                writer.write_eof()
+                responses = [json.loads(line) async for line in reader]
+                writer.close()
+            assert not service.batches
+            return responses
+
+    responses = asyncio.run(run())
+    assert sorted(response['index'] for response in responses) == list(range(len(params_list)))
+    assert all(response['params'] == params_list[response['index']] for response in responses)
+
+
+def test_service_answers_invalid_lines():
+    params = SCHEDULE_TEST_PARAMS[4]
+
+    async def run():
+        async with ScheduleService(workers=1, batch_size=2) as service:
+            server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write((json.dumps(params) + '\n').encode() + b'\xff\xfe\n' + b'{not json\n')
+                writer.write_eof()
+                responses = [json.loads(line) async for line in reader]
+                writer.close()
+            return responses
+
+    responses = sorted(asyncio.run(run()), key=lambda response: response['index'])
+    assert [response['index'] for response in responses] == [0, 1, 2]
+    assert responses[0]['params'] == params
+    assert all(response['error'] for response in responses[1:])
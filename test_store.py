@@ -0,0 +1,66 @@
+import random
+
+from constants import SCHEDULE_TEST_PARAMS
+from model import Schedule, DynamicProgrammingSearch, get_schedule_params, resolve_schedule
+from store import RosterStore, RECORD_LENGTH
+from test_model import randomized_schedule
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / 'roster.bin')
+    rng = random.Random(0)
+    schedules = [randomized_schedule(params, rng) for params in SCHEDULE_TEST_PARAMS]
+    with RosterStore(path) as store:
+        store.extend(schedules[:-1])
+        assert store.append(schedules[-1]) == len(schedules) - 1
+
+    with RosterStore(path) as store:
+        assert len(store) == len(schedules)
+        for i, schedule in enumerate(schedules):
+            restored = store.get(i)
+            assert restored.day_types == schedule.day_types
+            assert restored.fixed_days_off == schedule.fixed_days_off
+            assert restored.score.total == schedule.score.total
+            assert i in store.find(schedule.params_key)
+
+
+def test_store_ignores_torn_record(tmp_path):
+    path = str(tmp_path / 'roster.bin')
+    schedule = randomized_schedule(SCHEDULE_TEST_PARAMS[0], random.Random(1))
+    with RosterStore(path) as store:
+        store.append(schedule)
+    with open(path, 'ab') as f:
+        f.write(RECORD_LENGTH.pack(100) + b'torn')
+
+    with RosterStore(path) as store:
+        assert len(store) == 1
+        store.append(schedule)
+    with RosterStore(path) as store:
+        assert len(store) == 2
+        assert store.get(1).day_types == schedule.day_types
+        assert store.find(get_schedule_params(SCHEDULE_TEST_PARAMS[0])) == [0, 1]
+
+
+def test_store_appends_while_records_are_viewed(tmp_path):
+    path = str(tmp_path / 'roster.bin')
+    schedule = randomized_schedule(SCHEDULE_TEST_PARAMS[0], random.Random(2))
+    with RosterStore(path) as store:
+        store.append(schedule)
+        view = store.get_bytes(0)
+        store.append(schedule)
+        assert Schedule.from_bytes(view).day_types == schedule.day_types
+    # The view is still valid after the store is closed
+    assert bytes(view) == schedule.to_bytes()
+    view.release()
+
+
+def test_store_keeps_days_off_of_dates(tmp_path):
+    path = str(tmp_path / 'roster.bin')
+    schedule = DynamicProgrammingSearch(verbose=False).search(Schedule(get_schedule_params(SCHEDULE_TEST_PARAMS[0])))
+    resolved = resolve_schedule(schedule, remove_days_off=[schedule.fixed_days_off.index(1)])
+    with RosterStore(path) as store:
+        store.extend([schedule, resolved])
+    with RosterStore(path) as store:
+        assert store.find(schedule.params_key) == [0]
+        assert store.find(resolved.params_key) == [1]
+        assert store.get(1).fingerprint == resolved.fingerprint
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from constants import SCHEDULE_TEST_PARAMS
+from model import Schedule, get_schedule_params
+from test_model import randomized_schedule
+
+pytest.importorskip('numpy')
+
+from vectorized import score_schedules, rank_moves  # noqa: E402
+
+
+@pytest.mark.parametrize('params', SCHEDULE_TEST_PARAMS)
+def test_vectorized_scores_match(params):
+    rng = random.Random(0)
+    schedules = [randomized_schedule(params, rng) for _ in range(20)]
+    scores = score_schedules(schedules)
+    assert [(score.penalty, score.bonus) for score in scores] == \
+        [(schedule.score.penalty, schedule.score.bonus) for schedule in schedules]
+
+
+@pytest.mark.parametrize('params', SCHEDULE_TEST_PARAMS)
+def test_ranked_moves_match(params):
+    schedule = Schedule(get_schedule_params(params))
+    expected = {move.day_index: (move.score.penalty, move.score.bonus) for move in schedule.find_moves()}
+    ranked = rank_moves(schedule, schedule.find_moves())
+    assert {move.day_index: (move.score.penalty, move.score.bonus) for move in ranked} == expected
+    assert [(move.score.penalty, move.score.total) for move in ranked] == \
+        sorted((move.score.penalty, move.score.total) for move in ranked)
@@ -0,0 +1,141 @@
+# NumPy is optional, it's used only for scoring many schedules at once
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from constants import PENALTY_NUM_DAYS_GREATER, PENALTY_NUM_DAYS_LOWER, PENALTY_INVALID_CONSECUTIVE_DAYS, \
+    PENALTY_INVALID_DAY_OFF
+from model import DayType, ScheduleScore, invalid_day_off_mask, normalize_days_off
+
+
+def check_numpy():
+    """
+    Check whether NumPy is installed.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for vectorized scoring. Install it with `pip install numpy`.')
+
+
+def run_penalties(day_types, lengths, last_block, max_working, min_working, max_off, min_off):
+    """
+    Get the number of days each sequence of consecutive days is over/under the limits. Same as 'Schedule.run_penalty'.
+    :param day_types: array of sequence day types
+    :param lengths: array of sequence lengths
+    :param last_block: boolean array, True if sequence is in the last block
+    :param max_working: max consecutive working days
+    :param min_working: min consecutive working days
+    :param max_off: max consecutive days off
+    :param min_off: min consecutive days off
+    :return:
+    """
+    max_days = np.where(day_types == DayType.WORKING_DAY, max_working, max_off)
+    min_days = np.where(day_types == DayType.WORKING_DAY, min_working, min_off)
+    return np.where(max_days < lengths, lengths - max_days,
+                    np.where(~last_block & (lengths < min_days), min_days - lengths, 0))
+
+
+def score_matrix(matrix, schedule_params):
+    """
+    Score all schedules of the matrix. Results are the same as 'Schedule.evaluate' for each row.
+    :param matrix: 2-D array of 1s and 0s, one schedule per row
+    :param schedule_params: params list in the same order as for Schedule, or 'Schedule.params_key' with own masks of
+                            predefined days off
+    :return: arrays of penalties and bonuses
+    """
+    check_numpy()
+    num_days, max_working, min_working, max_off, min_off, days_off = schedule_params[:6]
+    matrix = np.asarray(matrix, dtype=np.int8)
+    n_schedules, n_days = matrix.shape
+
+    # Number of days penalty is the same for all schedules
+    days_difference = abs(n_days - num_days)
+    penalty = np.full(n_schedules, days_difference * (PENALTY_NUM_DAYS_GREATER if n_days > num_days
+                                                      else PENALTY_NUM_DAYS_LOWER), dtype=np.int64)
+
+    # Working days on predefined days off
+    invalid_days_off = schedule_params[7] if len(schedule_params) > 6 else \
+        invalid_day_off_mask(n_days, tuple(normalize_days_off(days_off)))
+    mask = np.frombuffer(invalid_days_off, dtype=np.int8)
+    penalty += PENALTY_INVALID_DAY_OFF * (matrix & mask).sum(axis=1, dtype=np.int64)
+
+    # Mark the first day of each sequence of consecutive days
+    starts = np.ones_like(matrix, dtype=bool)
+    starts[:, 1:] = matrix[:, 1:] != matrix[:, :-1]
+    start_rows, start_columns = np.nonzero(starts)
+    flat_starts = np.flatnonzero(starts)
+    lengths = np.diff(np.append(flat_starts, matrix.size))
+    types = matrix[start_rows, start_columns]
+
+    # Position of each sequence counted from the end of its schedule
+    runs_per_row = np.bincount(start_rows, minlength=n_schedules)
+    first_run = np.cumsum(runs_per_row) - runs_per_row
+    from_end = runs_per_row[start_rows] - 1 - (np.arange(len(start_rows)) - first_run[start_rows])
+    # The last block is the last sequence, together with the working days before it if it's sequence of days off
+    last_day_off = matrix[:, -1] == DayType.DAY_OFF
+    last_block = (from_end == 0) | ((from_end == 1) & last_day_off[start_rows])
+
+    consecutive_days = np.bincount(
+        start_rows, weights=run_penalties(types, lengths, last_block, max_working, min_working, max_off, min_off),
+        minlength=n_schedules).astype(np.int64)
+
+    # If the first day is day off, the first block has 0 working days
+    bonus = matrix.sum(axis=1, dtype=np.int64)
+    first_block = (matrix[:, 0] == DayType.DAY_OFF) & (bonus > 0)
+    consecutive_days += first_block * int(run_penalties(np.array(DayType.WORKING_DAY), np.array(0), np.array(False),
+                                                        max_working, min_working, max_off, min_off))
+
+    penalty += PENALTY_INVALID_CONSECUTIVE_DAYS * consecutive_days
+    return penalty, bonus
+
+
+def schedules_matrix(schedules):
+    """
+    Create the matrix of the schedules.
+    :param schedules: list of schedules with the same number of days
+    :return:
+    """
+    check_numpy()
+    return np.frombuffer(b''.join(schedule.day_types for schedule in schedules), dtype=np.int8) \
+        .reshape(len(schedules), -1)
+
+
+def score_schedules(schedules):
+    """
+    Score all schedules at once. Schedules must have the same params.
+    :param schedules: list of schedules
+    :return: list of Schedule Scores
+    """
+    penalties, bonuses = score_matrix(schedules_matrix(schedules), schedules[0].params_key)
+    return [ScheduleScore(int(penalty), int(bonus)) for penalty, bonus in zip(penalties, bonuses)]
+
+
+def moves_matrix(schedule, moves):
+    """
+    Create the matrix of the neighbors, without creating the neighbor schedules.
+    :param schedule: the schedule
+    :param moves: list of moves to the neighbors
+    :return:
+    """
+    check_numpy()
+    matrix = np.tile(np.frombuffer(bytes(schedule.day_types), dtype=np.int8), (len(moves), 1))
+    matrix[np.arange(len(moves)), [move.day_index for move in moves]] = [move.day_type for move in moves]
+    return matrix
+
+
+def rank_moves(schedule, moves):
+    """
+    Score all neighbors in a single pass and sort the moves from the best to the worst. Neighbors with the same score
+    keep their order.
+    :param schedule: the schedule
+    :param moves: list of moves to the neighbors
+    :return: sorted list of moves with updated scores
+    """
+    if not moves:
+        return []
+    penalties, bonuses = score_matrix(moves_matrix(schedule, moves), schedule.params_key)
+    for move, penalty, bonus in zip(moves, penalties, bonuses):
+        move.score = ScheduleScore(int(penalty), int(bonus))
+    order = np.lexsort((penalties - bonuses, penalties))
+    return [moves[i] for i in order]